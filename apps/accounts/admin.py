@@ -3,6 +3,7 @@ from django.contrib import admin
 # Register your models here.
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth import get_user_model
+from apps.core.paginator import ApproximateCountPaginator
 from .models import UserProfile, Role, Permission
 
 User = get_user_model()
@@ -38,6 +39,8 @@ class CustomUserAdmin(UserAdmin):
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'date_joined', 'userprofile__entity')
     search_fields = ('username', 'first_name', 'last_name', 'email')
     ordering = ('-date_joined',)
+    show_full_result_count = False
+    paginator = ApproximateCountPaginator
 
     def get_inline_instances(self, request, obj=None):
         if not obj:
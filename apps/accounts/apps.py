@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from rest_framework.authtoken.models import Token
+        from .signals import clear_cached_token_key
+        post_delete.connect(clear_cached_token_key, sender=Token)
@@ -279,6 +279,7 @@ class BulkUserActionForm(forms.Form):
         ('assign_role', 'Assign Role'),
         ('remove_role', 'Remove Role'),
     ]
+    MAX_USERS = 500
     
     action = forms.ChoiceField(
         choices=ACTION_CHOICES,
@@ -293,6 +294,15 @@ class BulkUserActionForm(forms.Form):
         widget=forms.HiddenInput()
     )
 
+    def clean_user_ids(self):
+        user_ids = [value for value in self.cleaned_data['user_ids'].split(',') if value.strip()]
+        if len(user_ids) > self.MAX_USERS:
+            raise ValidationError(f"You can select at most {self.MAX_USERS} users at a time.")
+        
+        # Coerce to the primary key type so the IN clause needs no casting
+        to_python = User._meta.pk.to_python
+        return [to_python(value.strip()) for value in user_ids]
+
     def clean(self):
         cleaned_data = super().clean()
         action = cleaned_data.get('action')
@@ -472,6 +472,15 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 
+class UserLoginResponseSerializer(serializers.ModelSerializer):
+    """Slim user payload returned on login"""
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'email', 'is_active']
+        read_only_fields = fields
+
+
 class PasswordChangeSerializer(serializers.Serializer):
     """Serializer for password change"""
     
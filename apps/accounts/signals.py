@@ -0,0 +1,11 @@
+from django.core.cache import cache
+
+
+AUTH_TOKEN_CACHE_KEY = 'auth_token:{}'
+
+
+def clear_cached_token_key(sender, instance, **kwargs):
+    """
+    Drop the cached key of a deleted token so login doesn't hand it out again.
+    """
+    cache.delete(AUTH_TOKEN_CACHE_KEY.format(instance.user_id))
@@ -1,3 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
 
-# Create your tests here.
+from .signals import AUTH_TOKEN_CACHE_KEY
+
+User = get_user_model()
+
+
+class AuthTokenCacheTests(TestCase):
+    """
+    Tests for the cached auth token key handed out at login.
+    """
+    def test_deleting_the_token_clears_the_cached_key(self):
+        user = User.objects.create_user(email='shopper@example.com', first_name='Shop', last_name='Per')
+        token = Token.objects.create(user=user)
+        cache_key = AUTH_TOKEN_CACHE_KEY.format(user.pk)
+        cache.set(cache_key, token.key)
+
+        token.delete()
+
+        self.assertIsNone(cache.get(cache_key))
@@ -756,6 +756,7 @@ from django.urls import reverse_lazy, reverse
 from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
 from django.db.models import Q, Count
 from django.core.paginator import Paginator
+from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.forms import AuthenticationForm
@@ -765,6 +766,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from .models import UserProfile, Role, Permission
+from .signals import AUTH_TOKEN_CACHE_KEY
 from .forms import (
     CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm,
     RoleForm, PasswordResetForm, UserSearchForm, BulkUserActionForm
@@ -772,11 +774,13 @@ from .forms import (
 from .serializers import (
     UserSerializer, UserProfileSerializer, RoleSerializer, PermissionSerializer,
     UserRegistrationSerializer, UserLoginSerializer, PasswordChangeSerializer,
-    UserListSerializer, UserStatsSerializer
+    UserListSerializer, UserStatsSerializer, UserLoginResponseSerializer
 )
 
 User = get_user_model()
 
+AUTH_TOKEN_CACHE_TIMEOUT = 300  # 5 minutes
+
 
 # Authentication Views
 class LoginView(FormView):
@@ -929,7 +933,10 @@ class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     permission_required = 'accounts.view_user'
 
     def get_queryset(self):
-        queryset = User.objects.select_related('userprofile', 'userprofile__role')
+        queryset = User.objects.select_related('userprofile', 'userprofile__role').only(
+            'id', 'username', 'first_name', 'last_name', 'email', 'is_active',
+            'date_joined', 'userprofile__entity', 'userprofile__role__name'
+        )
         
         # Apply search filters
         search_form = UserSearchForm(self.request.GET)
@@ -991,7 +998,19 @@ class UserDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
 
 
 # API Views
-class UserViewSet(viewsets.ModelViewSet):
+class UserEntityMixin:
+    """Resolve the requesting user's entity once per request"""
+
+    def get_user_entity(self):
+        user = self.request.user
+        if not hasattr(user, '_cached_entity'):
+            user._cached_entity = UserProfile.objects.filter(
+                user_id=user.id
+            ).values_list('entity', flat=True).first()
+        return user._cached_entity
+
+
+class UserViewSet(UserEntityMixin, viewsets.ModelViewSet):
     """ViewSet for User CRUD operations"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -1002,11 +1021,9 @@ class UserViewSet(viewsets.ModelViewSet):
         
         # Filter by entity if user is not superuser
         if not self.request.user.is_superuser:
-            try:
-                user_entity = self.request.user.userprofile.entity
+            user_entity = self.get_user_entity()
+            if user_entity is not None:
                 queryset = queryset.filter(userprofile__entity=user_entity)
-            except UserProfile.DoesNotExist:
-                pass
         
         return queryset
 
@@ -1039,7 +1056,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(UserEntityMixin, viewsets.ModelViewSet):
     """ViewSet for UserProfile CRUD operations"""
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
@@ -1050,11 +1067,9 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         
         # Filter by entity if user is not superuser
         if not self.request.user.is_superuser:
-            try:
-                user_entity = self.request.user.userprofile.entity
+            user_entity = self.get_user_entity()
+            if user_entity is not None:
                 queryset = queryset.filter(entity=user_entity)
-            except UserProfile.DoesNotExist:
-                pass
         
         return queryset
 
@@ -1088,16 +1103,25 @@ class APILoginView(APIView):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            token, created = Token.objects.get_or_create(user=user)
             
             return Response({
-                'token': token.key,
-                'user': UserSerializer(user).data,
+                'token': self.get_token_key(user),
+                'user': UserLoginResponseSerializer(user).data,
                 'message': 'Login successful'
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def get_token_key(self, user):
+        """Return the user's auth token key, creating the token on first login"""
+        cache_key = AUTH_TOKEN_CACHE_KEY.format(user.pk)
+        key = cache.get(cache_key)
+        if key is None:
+            token, created = Token.objects.get_or_create(user=user)
+            key = token.key
+            cache.set(cache_key, key, AUTH_TOKEN_CACHE_TIMEOUT)
+        return key
+
 
 class APILogoutView(APIView):
     """API logout view"""
@@ -1308,7 +1332,7 @@ class UserBulkActionView(LoginRequiredMixin, PermissionRequiredMixin, View):
         form = BulkUserActionForm(request.POST)
         if form.is_valid():
             action = form.cleaned_data['action']
-            user_ids = form.cleaned_data['user_ids'].split(',')
+            user_ids = form.cleaned_data['user_ids']
             users = User.objects.filter(id__in=user_ids)
             
             if action == 'activate':
@@ -1361,8 +1385,11 @@ class UserExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
         writer = csv.writer(response)
         writer.writerow(['Username', 'Email', 'First Name', 'Last Name', 'Entity', 'Department', 'Position', 'Is Active', 'Date Joined'])
         
-        users = User.objects.select_related('userprofile')
-        for user in users:
+        users = User.objects.select_related('userprofile').only(
+            'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined',
+            'userprofile__entity', 'userprofile__department', 'userprofile__position'
+        )
+        for user in users.iterator():
             profile = getattr(user, 'userprofile', None)
             writer.writerow([
                 user.username,
@@ -1,3 +1,27 @@
 from django.contrib import admin
 
 # Register your models here.
+from django.contrib.admin.views.main import ChangeList
+
+
+class OnlyFieldsChangeList(ChangeList):
+    """
+    Changelist that loads only the columns listed in ``list_only_fields``.
+    """
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.only(*self.model_admin.list_only_fields)
+
+
+class OnlyFieldsAdminMixin:
+    """
+    Narrow the changelist SELECT to ``list_only_fields`` when it is set.
+
+    The change form keeps loading full rows through ``get_queryset``.
+    """
+    list_only_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        if self.list_only_fields:
+            return OnlyFieldsChangeList
+        return super().get_changelist(request, **kwargs)
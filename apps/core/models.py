@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 import uuid
@@ -142,6 +143,16 @@ class SoftDeleteMixin(models.Model):
         self.deleted_by = None
         self.save()
 
+class GenericObjectQuerySet(models.QuerySet):
+    """
+    QuerySet for models attached to other records through a generic relation.
+    """
+    def with_targets(self):
+        """
+        Load content types and related objects in one query per content type.
+        """
+        return self.select_related('content_type').prefetch_related('content_object')
+
 class Address(BaseModel):
     """
     Generic address model for storing addresses.
@@ -168,6 +179,8 @@ class Address(BaseModel):
     object_id = models.UUIDField()
     content_object = models.GenericForeignKey('content_type', 'object_id')
 
+    objects = GenericObjectQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Addresses'
         indexes = [
@@ -216,6 +229,8 @@ class PhoneNumber(BaseModel):
     object_id = models.UUIDField()
     content_object = models.GenericForeignKey('content_type', 'object_id')
 
+    objects = GenericObjectQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
@@ -256,6 +271,8 @@ class Attachment(BaseModel):
     object_id = models.UUIDField()
     content_object = models.GenericForeignKey('content_type', 'object_id')
 
+    objects = GenericObjectQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
@@ -268,10 +285,16 @@ class Attachment(BaseModel):
     def save(self, *args, **kwargs):
         """
         Save file size and mime type on save.
+
+        The size is read from the uploaded file while it is still in memory,
+        so remote storages are only asked for metadata when a new attachment
+        arrives without one.
         """
-        if self.file:
-            self.file_size = self.file.size
+        if self.file and not self.file._committed:
+            self.file_size = self.file.file.size
             # You can add logic to detect mime type here
+        elif self.file and self.file_size is None and self._state.adding:
+            self.file_size = self.file.size
         super().save(*args, **kwargs)
 
 class AuditLog(BaseModel):
@@ -298,6 +321,9 @@ class AuditLog(BaseModel):
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['model_name', 'object_id']),
             models.Index(fields=['action', 'created_at']),
+            # Audit rows are append-only, so a BRIN index keeps time-range
+            # scans cheap at a fraction of the size of a btree.
+            BrinIndex(fields=['created_at'], name='core_auditlog_created_brin'),
         ]
 
     def __str__(self):
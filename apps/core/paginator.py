@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that uses the Postgres row estimate for unfiltered querysets.
+
+    Filtered querysets still get an exact COUNT(*), since their result sets
+    are usually small enough for it to be cheap. So do tables below
+    exact_count_threshold rows, where the estimate is least reliable.
+    """
+    cache_timeout = 60
+    exact_count_threshold = 100000
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return super().count
+
+        db_table = query.model._meta.db_table
+        cache_key = f'approx_count:{db_table}'
+        estimate = cache.get(cache_key)
+        if estimate is None:
+            estimate = self.get_estimate(db_table, self.object_list.db)
+            cache.set(cache_key, estimate, self.cache_timeout)
+
+        # Small tables are cheap to count, and never-analyzed ones report -1
+        if estimate < self.exact_count_threshold:
+            return super().count
+        self.count_is_estimate = True
+        return estimate
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # A low estimate hides the last rows; serve pages that still have some
+            if not self.count_is_estimate or int(number) < 1:
+                raise
+            number = int(number)
+            if not self.object_list[(number - 1) * self.per_page:].exists():
+                raise
+            return number
+
+    def page(self, number):
+        if not self.count_is_estimate:
+            return super().page(number)
+
+        # Don't cut the slice off at the estimated count, it may be low
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def get_estimate(self, db_table, using):
+        """
+        Return the planner's row estimate for a table, or -1 if unavailable.
+        """
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return -1
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else -1
@@ -1,3 +1,44 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
 from django.test import TestCase
 
-# Create your tests here.
+from .paginator import ApproximateCountPaginator
+
+User = get_user_model()
+
+
+class ApproximateCountPaginatorTests(TestCase):
+    """
+    Tests for paging with a planner row estimate.
+    """
+    def setUp(self):
+        cache.delete(f'approx_count:{User._meta.db_table}')
+        for i in range(5):
+            User.objects.create_user(email=f'user{i}@example.com', first_name='User', last_name=str(i))
+        self.queryset = User.objects.order_by('email')
+
+    def get_paginator(self, estimate):
+        paginator = ApproximateCountPaginator(self.queryset, 2)
+        paginator.exact_count_threshold = 0
+        patcher = mock.patch.object(paginator, 'get_estimate', return_value=estimate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return paginator
+
+    def test_low_estimate_still_serves_last_rows(self):
+        paginator = self.get_paginator(estimate=2)
+
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(len(paginator.page(2).object_list), 2)
+        self.assertEqual(len(paginator.page(3).object_list), 1)
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+
+    def test_small_tables_get_an_exact_count(self):
+        paginator = ApproximateCountPaginator(self.queryset, 2)
+        with mock.patch.object(paginator, 'get_estimate', return_value=2):
+            self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.count_is_estimate)
@@ -1,51 +1,57 @@
-from django.contrib import admin
+from decimal import Decimal
 
-# Register your models here.
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.utils.html import format_html
-from django.db.models import Sum, Count
-from .models import Customer, CustomerAddress, CustomerGroup, LoyaltyProgram, LoyaltyTransaction, CustomerNote
+from django.db.models import Sum, Count, F, Q, OuterRef, Subquery, Value, CharField
+from django.db.models.functions import Concat
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery
+from apps.core.admin import OnlyFieldsAdminMixin
+from apps.core.paginator import ApproximateCountPaginator
+from .models import (
+    Customer, CustomerGroup, CustomerGroupMembership, CustomerLoyalty, LoyaltyProgram, LoyaltyTransaction
+)
 
+LOYALTY_CUSTOMER_FIELDS = tuple(f'loyalty_account__customer__{field}' for field in Customer.DISPLAY_FIELDS)
 
-class CustomerAddressInline(admin.TabularInline):
-    model = CustomerAddress
-    extra = 0
-    fields = ('address_type', 'address_line1', 'address_line2', 'city', 'state', 'postal_code', 'is_default', 'is_active')
 
-
-class CustomerNoteInline(admin.TabularInline):
-    model = CustomerNote
-    extra = 0
-    readonly_fields = ('created_by', 'created_at')
-    fields = ('note', 'is_internal', 'created_by', 'created_at')
+class CustomerActionForm(ActionForm):
+    points = forms.IntegerField(min_value=1, required=False, label='Points')
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
-    list_display = ('customer_code', 'full_name', 'email', 'phone', 'customer_group', 'total_orders', 'total_spent', 'loyalty_points', 'is_active')
-    list_filter = ('customer_group', 'is_active', 'gender', 'entity', 'created_at', 'last_purchase_date')
+class CustomerAdmin(OnlyFieldsAdminMixin, admin.ModelAdmin):
+    list_display = ('customer_code', 'full_name', 'email', 'phone', 'group_name', 'order_count', 'total_spent', 'loyalty_points', 'status')
+    list_filter = ('group_memberships__group', 'status', 'gender', 'entity')
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
     search_fields = ('customer_code', 'first_name', 'last_name', 'email', 'phone')
-    readonly_fields = ('customer_code', 'total_orders', 'total_spent', 'loyalty_points', 'last_purchase_date', 'created_at', 'updated_at')
-    inlines = [CustomerAddressInline, CustomerNoteInline]
+    readonly_fields = ('customer_code', 'order_count', 'total_spent', 'loyalty_points', 'last_purchase_date', 'created_at', 'updated_at')
+    list_only_fields = ('customer_code', 'first_name', 'last_name', 'email', 'phone', 'status')
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('customer_code', 'entity', 'first_name', 'last_name', 'email', 'phone')
+            'fields': ('customer_code', 'entity', 'customer_type', 'first_name', 'last_name', 'company_name', 'email', 'phone', 'alternate_phone')
         }),
         ('Personal Details', {
-            'fields': ('date_of_birth', 'gender', 'profile_picture')
+            'fields': ('date_of_birth', 'anniversary_date', 'gender')
+        }),
+        ('Business Details', {
+            'fields': ('gstin', 'business_license', 'credit_limit', 'current_balance')
         }),
         ('Customer Details', {
-            'fields': ('customer_group', 'preferred_contact_method', 'language_preference')
+            'fields': ('customer_segment', 'acquisition_source', 'referral_source', 'tags', 'user')
         }),
         ('Purchase History', {
-            'fields': ('total_orders', 'total_spent', 'loyalty_points', 'last_purchase_date')
+            'fields': ('order_count', 'total_spent', 'loyalty_points', 'last_purchase_date')
         }),
         ('Marketing & Communication', {
-            'fields': ('accepts_marketing', 'email_verified', 'phone_verified')
+            'fields': ('preferred_communication', 'newsletter_subscription', 'sms_marketing')
         }),
         ('Account Settings', {
-            'fields': ('is_active', 'notes')
+            'fields': ('status', 'notes')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -54,74 +60,89 @@ class CustomerAdmin(admin.ModelAdmin):
     )
 
     def full_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}"
+        return obj._full_name
     full_name.short_description = 'Full Name'
-
-    def save_model(self, request, obj, form, change):
-        if not obj.customer_code:
-            # Generate customer code
-            prefix = 'MPS' if obj.entity == 'mpshoes' else 'MPF'
-            last_customer = Customer.objects.filter(entity=obj.entity).order_by('-id').first()
-            next_id = 1 if not last_customer else last_customer.id + 1
-            obj.customer_code = f"{prefix}C{next_id:06d}"
-        super().save_model(request, obj, form, change)
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.select_related('customer_group')
-
-
-@admin.register(CustomerAddress)
-class CustomerAddressAdmin(admin.ModelAdmin):
-    list_display = ('customer', 'address_type', 'city', 'state', 'postal_code', 'is_default', 'is_active')
-    list_filter = ('address_type', 'is_default', 'is_active', 'state', 'created_at')
-    search_fields = ('customer__first_name', 'customer__last_name', 'customer__email', 'address_line1', 'city')
-    readonly_fields = ('created_at', 'updated_at')
-    
-    fieldsets = (
-        ('Customer Information', {
-            'fields': ('customer', 'address_type', 'contact_name', 'contact_phone')
-        }),
-        ('Address Details', {
-            'fields': ('address_line1', 'address_line2', 'city', 'state', 'postal_code', 'country')
-        }),
-        ('Settings', {
-            'fields': ('is_default', 'is_active')
-        }),
-        ('Additional Information', {
-            'fields': ('delivery_instructions',),
-            'classes': ('collapse',)
-        }),
-        ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
-            'classes': ('collapse',)
-        }),
-    )
+    full_name.admin_order_field = '_full_name'
+
+    def group_name(self, obj):
+        return obj._group_name or ''
+    group_name.short_description = 'Customer Groups'
+    group_name.admin_order_field = '_group_name'
+
+    # A customer can belong to several groups, so list their active ones
+    group_names = CustomerGroupMembership.objects.filter(
+        customer=OuterRef('pk'), is_active=True
+    ).order_by().values('customer').annotate(
+        names=StringAgg('group__name', ', ', ordering='group__name')
+    ).values('names')
+
+    def order_count(self, obj):
+        return obj.order_count
+    order_count.short_description = 'Orders'
+    order_count.admin_order_field = 'order_count'
+
+    def total_spent(self, obj):
+        return obj.total_spent or Decimal('0.00')
+    total_spent.short_description = 'Total Spent'
+    total_spent.admin_order_field = 'total_spent'
+
+    def loyalty_points(self, obj):
+        return obj._loyalty_points or 0
+    loyalty_points.short_description = 'Loyalty Points'
+    loyalty_points.admin_order_field = '_loyalty_points'
+
+    def last_purchase_date(self, obj):
+        return obj.last_sale_date
+    last_purchase_date.short_description = 'Last Purchase'
 
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.select_related('customer')
+        # Purchase totals come from the sales table rather than stored columns
+        qs = super().get_queryset(request).with_sales_stats()
+        return qs.annotate(
+            _full_name=Concat('first_name', Value(' '), 'last_name', output_field=CharField()),
+            _group_name=Subquery(self.group_names),
+            _loyalty_points=F('loyalty_account__points_balance'),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        terms = search_term.split()
+        if not terms:
+            return super().get_search_results(request, queryset, search_term)
+        if '@' in search_term:
+            # Partial emails don't tokenize like stored ones; the trigram index covers this
+            return queryset.filter(email__icontains=search_term.strip()), False
+
+        # Match every word as a prefix so partial codes, phones and names still hit
+        raw_query = ' & '.join(
+            "'{}':*".format(term.replace('\\', '\\\\').replace("'", "''"))
+            for term in terms
+        )
+        query = SearchQuery(raw_query, config='simple', search_type='raw')
+        return queryset.filter(search=query), False
 
 
 @admin.register(CustomerGroup)
 class CustomerGroupAdmin(admin.ModelAdmin):
-    list_display = ('name', 'entity', 'discount_percentage', 'member_count', 'is_active', 'created_at')
-    list_filter = ('entity', 'is_active', 'created_at')
+    list_display = ('name', 'entity', 'discount_percentage', 'member_count', 'status', 'created_at')
+    list_filter = ('entity', 'status', 'is_automatic', 'created_at')
     search_fields = ('name', 'description')
     readonly_fields = ('member_count', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'entity', 'description')
+            'fields': ('name', 'entity', 'description', 'color_code')
         }),
         ('Benefits', {
-            'fields': ('discount_percentage', 'special_pricing', 'free_shipping_threshold')
+            'fields': ('discount_percentage', 'special_pricing')
+        }),
+        ('Marketing', {
+            'fields': ('marketing_emails', 'sms_campaigns')
         }),
         ('Conditions', {
-            'fields': ('minimum_orders', 'minimum_spent', 'conditions')
+            'fields': ('is_automatic', 'criteria')
         }),
         ('Settings', {
-            'fields': ('is_active', 'auto_assign')
+            'fields': ('status',)
         }),
         ('Statistics', {
             'fields': ('member_count',)
@@ -133,32 +154,33 @@ class CustomerGroupAdmin(admin.ModelAdmin):
     )
 
     def member_count(self, obj):
-        return obj.customers.count()
+        return obj.active_customer_count
     member_count.short_description = 'Members'
+    member_count.admin_order_field = 'active_customer_count'
 
 
 @admin.register(LoyaltyProgram)
 class LoyaltyProgramAdmin(admin.ModelAdmin):
-    list_display = ('name', 'entity', 'points_per_currency', 'currency_per_point', 'is_active', 'created_at')
-    list_filter = ('entity', 'is_active', 'created_at')
+    list_display = ('name', 'entity', 'program_type', 'points_per_rupee', 'rupees_per_point', 'status', 'created_at')
+    list_filter = ('entity', 'program_type', 'status', 'created_at')
     search_fields = ('name', 'description')
     readonly_fields = ('total_members', 'total_points_issued', 'total_points_redeemed', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Program Information', {
-            'fields': ('name', 'entity', 'description')
+            'fields': ('name', 'entity', 'program_type', 'description')
         }),
         ('Point System', {
-            'fields': ('points_per_currency', 'currency_per_point', 'minimum_points_redeem')
+            'fields': ('points_per_rupee', 'rupees_per_point', 'minimum_points_redemption')
         }),
         ('Rules & Conditions', {
-            'fields': ('point_expiry_days', 'max_points_per_transaction', 'terms_conditions')
+            'fields': ('points_expiry_days', 'start_date', 'end_date', 'terms_and_conditions')
         }),
         ('Statistics', {
             'fields': ('total_members', 'total_points_issued', 'total_points_redeemed')
         }),
         ('Settings', {
-            'fields': ('is_active',)
+            'fields': ('status',)
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -166,42 +188,81 @@ class LoyaltyProgramAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_program_stats(self, obj):
+        """
+        Aggregate the program statistics once per object and cache them on it.
+
+        Members are the enrolled accounts, including those without any
+        transactions yet.
+        """
+        if not hasattr(obj, '_stats'):
+            if obj._state.adding:
+                obj._stats = {}
+            else:
+                obj._stats = CustomerLoyalty.objects.filter(program=obj).aggregate(
+                    members=Count('pk', distinct=True),
+                    issued=Sum('transactions__points', filter=Q(transactions__transaction_type='EARN')),
+                    redeemed=Sum('transactions__points', filter=Q(transactions__transaction_type='REDEEM')),
+                )
+        return obj._stats
+
     def total_members(self, obj):
-        return Customer.objects.filter(loyalty_points__gt=0).count()
+        return self.get_program_stats(obj).get('members') or 0
     total_members.short_description = 'Total Members'
 
     def total_points_issued(self, obj):
-        return LoyaltyTransaction.objects.filter(
-            transaction_type='earned',
-            program=obj
-        ).aggregate(total=Sum('points'))['total'] or 0
+        return self.get_program_stats(obj).get('issued') or 0
     total_points_issued.short_description = 'Points Issued'
 
     def total_points_redeemed(self, obj):
-        return LoyaltyTransaction.objects.filter(
-            transaction_type='redeemed',
-            program=obj
-        ).aggregate(total=Sum('points'))['total'] or 0
+        return self.get_program_stats(obj).get('redeemed') or 0
     total_points_redeemed.short_description = 'Points Redeemed'
 
 
+@admin.register(CustomerLoyalty)
+class CustomerLoyaltyAdmin(OnlyFieldsAdminMixin, admin.ModelAdmin):
+    list_display = ('customer', 'program', 'points_balance', 'total_points_earned', 'total_points_redeemed', 'is_active', 'last_activity_date')
+    list_filter = ('entity', 'program', 'is_active')
+    search_fields = ('customer__customer_code', 'customer__first_name', 'customer__last_name', 'customer__email', 'customer__phone')
+    # Balances only move through the transaction ledger
+    readonly_fields = ('points_balance', 'total_points_earned', 'total_points_redeemed', 'last_activity_date', 'created_at', 'updated_at')
+    list_select_related = ('customer', 'program')
+    list_only_fields = tuple(f'customer__{field}' for field in Customer.DISPLAY_FIELDS) + (
+        'program__name', 'points_balance', 'total_points_earned', 'total_points_redeemed', 'is_active', 'last_activity_date'
+    )
+    autocomplete_fields = ('customer',)
+    ordering = ('-enrolled_date',)
+    show_full_result_count = False
+
+
 @admin.register(LoyaltyTransaction)
-class LoyaltyTransactionAdmin(admin.ModelAdmin):
-    list_display = ('customer', 'transaction_type', 'points', 'transaction_date', 'reference_type', 'reference_id', 'expiry_date')
-    list_filter = ('transaction_type', 'program', 'transaction_date', 'expiry_date')
-    search_fields = ('customer__first_name', 'customer__last_name', 'customer__email', 'reference_id', 'description')
-    readonly_fields = ('created_at',)
-    date_hierarchy = 'transaction_date'
+class LoyaltyTransactionAdmin(OnlyFieldsAdminMixin, admin.ModelAdmin):
+    list_display = ('customer', 'program', 'transaction_type', 'points', 'created_at', 'reference_type', 'reference_id', 'expires_at')
+    list_filter = ('transaction_type', 'loyalty_account__program', 'is_expired', 'created_at')
+    search_fields = (
+        'loyalty_account__customer__customer_code', 'loyalty_account__customer__first_name',
+        'loyalty_account__customer__last_name', 'reference_id', 'description'
+    )
+    readonly_fields = ('balance_before', 'balance_after', 'created_at')
+    list_select_related = ('loyalty_account__customer', 'loyalty_account__program')
+    list_only_fields = LOYALTY_CUSTOMER_FIELDS + (
+        'loyalty_account__program__name',
+        'transaction_type', 'points', 'created_at', 'reference_type', 'reference_id', 'expires_at'
+    )
+    autocomplete_fields = ('loyalty_account',)
+    show_full_result_count = False
+    paginator = ApproximateCountPaginator
+    date_hierarchy = 'created_at'
     
     fieldsets = (
         ('Transaction Information', {
-            'fields': ('customer', 'program', 'transaction_type', 'points', 'transaction_date')
+            'fields': ('entity', 'loyalty_account', 'transaction_type', 'points', 'balance_before', 'balance_after')
         }),
         ('Reference Details', {
             'fields': ('reference_type', 'reference_id', 'description')
         }),
         ('Expiry Information', {
-            'fields': ('expiry_date', 'is_expired')
+            'fields': ('expires_at', 'is_expired')
         }),
         ('Timestamps', {
             'fields': ('created_at',),
@@ -209,42 +270,62 @@ class LoyaltyTransactionAdmin(admin.ModelAdmin):
         }),
     )
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.select_related('customer', 'program')
-
+    def customer(self, obj):
+        return obj.loyalty_account.customer
+    customer.short_description = 'Customer'
 
-@admin.register(CustomerNote)
-class CustomerNoteAdmin(admin.ModelAdmin):
-    list_display = ('customer', 'note_preview', 'is_internal', 'created_by', 'created_at')
-    list_filter = ('is_internal', 'created_at')
-    search_fields = ('customer__first_name', 'customer__last_name', 'customer__email', 'note')
-    readonly_fields = ('created_at',)
-    
-    def note_preview(self, obj):
-        return obj.note[:50] + "..." if len(obj.note) > 50 else obj.note
-    note_preview.short_description = 'Note'
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.select_related('customer', 'created_by')
+    def program(self, obj):
+        return obj.loyalty_account.program.name
+    program.short_description = 'Program'
 
 
 # Custom admin actions
+def set_customer_status(queryset, status):
+    # update() skips post_save, so recount the affected groups here
+    changed = queryset.exclude(status=status)
+    group_ids = list(
+        CustomerGroupMembership.objects.filter(customer__in=changed).values_list('group_id', flat=True).distinct()
+    )
+    changed.update(status=status)
+    CustomerGroup.refresh_customer_counts(group_ids)
+
 def activate_customers(modeladmin, request, queryset):
-    queryset.update(is_active=True)
+    set_customer_status(queryset, 'ACTIVE')
 activate_customers.short_description = "Activate selected customers"
 
 def deactivate_customers(modeladmin, request, queryset):
-    queryset.update(is_active=False)
+    set_customer_status(queryset, 'INACTIVE')
 deactivate_customers.short_description = "Deactivate selected customers"
 
 def enable_marketing(modeladmin, request, queryset):
-    queryset.update(accepts_marketing=True)
+    queryset.filter(
+        Q(newsletter_subscription=False) | Q(sms_marketing=False)
+    ).update(newsletter_subscription=True, sms_marketing=True)
 enable_marketing.short_description = "Enable marketing for selected customers"
 
 def disable_marketing(modeladmin, request, queryset):
-    queryset.update(accepts_marketing=False)
+    queryset.filter(
+        Q(newsletter_subscription=True) | Q(sms_marketing=True)
+    ).update(newsletter_subscription=False, sms_marketing=False)
 disable_marketing.short_description = "Disable marketing for selected customers"
 
-CustomerAdmin.actions = [activate_customers, deactivate_customers, enable_marketing, disable_marketing]
\ No newline at end of file
+def adjust_points(modeladmin, request, queryset):
+    form = CustomerActionForm(request.POST)
+    form.fields['action'].choices = modeladmin.get_action_choices(request)
+    points = form.cleaned_data['points'] if form.is_valid() else None
+    if not points:
+        modeladmin.message_user(request, "Enter the number of points to add.", messages.ERROR)
+        return
+    # Go through the ledger so every balance change has a transaction
+    account_ids = CustomerLoyalty.objects.filter(
+        customer__in=queryset.values('pk')
+    ).values_list('pk', flat=True)
+    transactions = CustomerLoyalty.grant_bulk(
+        [(account_id, points, 'Admin adjustment') for account_id in account_ids],
+        reference_type='ADMIN'
+    )
+    modeladmin.message_user(request, f"Added {points} points to {len(transactions)} loyalty accounts.")
+adjust_points.short_description = "Add loyalty points to selected customers"
+
+CustomerAdmin.actions = [activate_customers, deactivate_customers, enable_marketing, disable_marketing, adjust_points]
+CustomerAdmin.action_form = CustomerActionForm
\ No newline at end of file
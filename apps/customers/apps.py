@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
+
+    def ready(self):
+        from .signals import install_customer_code_trigger, install_customer_search_trigger
+        post_migrate.connect(install_customer_code_trigger, sender=self)
+        post_migrate.connect(install_customer_search_trigger, sender=self)
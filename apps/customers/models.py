@@ -1,18 +1,102 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Coalesce, Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.functional import cached_property
 from decimal import Decimal
 
 from apps.core.models import (
     BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, 
-    SoftDeleteMixin, Address, PhoneNumber, Attachment
+    SoftDeleteMixin, SoftDeleteManager, Address, PhoneNumber, Attachment
 )
 
 User = get_user_model()
 
 
+class ReturningFieldMixin:
+    """
+    Read the column back from INSERT ... RETURNING, for values a database
+    trigger may fill in.
+    """
+    db_returning = True
+
+
+class ReturningCharField(ReturningFieldMixin, models.CharField):
+    pass
+
+
+class ReturningPositiveIntegerField(ReturningFieldMixin, models.PositiveIntegerField):
+    pass
+
+
+class CustomerQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers for customer reporting.
+    """
+    def slim(self):
+        """
+        Load only the columns needed to render a customer's name.
+        """
+        return self.only(*Customer.DISPLAY_FIELDS)
+
+    def with_sales_stats(self):
+        """
+        Annotate purchase statistics from confirmed and completed sales.
+        """
+        completed = models.Q(sales__sale_status__in=['CONFIRMED', 'COMPLETED'])
+        return self.annotate(
+            total_spent=models.Sum('sales__total_amount', filter=completed),
+            order_count=models.Count('sales', filter=completed),
+            last_sale_date=models.Max('sales__sale_date', filter=completed),
+            first_sale_date=models.Min('sales__sale_date', filter=completed),
+        )
+
+    def with_contacts(self):
+        """
+        Prefetch the addresses and phone numbers used by the contact getters.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                'addresses',
+                queryset=Address.objects.filter(type__in=['HOME', 'SHIPPING']).order_by('pk'),
+                to_attr='_cached_addresses'
+            ),
+            models.Prefetch(
+                'phone_numbers',
+                queryset=PhoneNumber.objects.filter(is_primary=True).order_by('pk'),
+                to_attr='_cached_primary_phones'
+            ),
+        )
+
+
+CustomerManager = SoftDeleteManager.from_queryset(CustomerQuerySet)
+
+DISPLAY_NAME_CACHE_KEY = 'cust:dn:{}'
+DISPLAY_NAME_CACHE_TIMEOUT = 3600  # 1 hour
+
+# Stats are keyed on a per-customer signature that changes with each sale
+STATS_SIGNATURE_CACHE_KEY = 'cust:sig:{}'
+STATS_CACHE_KEY = 'cust:stats:{}:{}'
+STATS_CACHE_TIMEOUT = 3600  # 1 hour
+
+
+def get_customer_display_name(customer_id):
+    """
+    Return a customer's display name without loading the full customer row.
+    """
+    return cache.get_or_set(
+        DISPLAY_NAME_CACHE_KEY.format(customer_id),
+        lambda: Customer.all_objects.only(*Customer.DISPLAY_FIELDS).get(pk=customer_id).display_name,
+        DISPLAY_NAME_CACHE_TIMEOUT
+    )
+
+
 class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMixin):
     """
     Customer model for managing customer information.
@@ -31,7 +115,9 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
     ]
 
     # Basic Information
-    customer_code = models.CharField(max_length=20, unique=True)
+    # Assigned when left blank, by a database trigger on Postgres
+    customer_code = ReturningCharField(max_length=20, unique=True, blank=True)
+    customer_code_seq = ReturningPositiveIntegerField(null=True, blank=True, editable=False)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100, blank=True)
     company_name = models.CharField(max_length=200, blank=True)
@@ -102,7 +188,10 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
     
     # Additional Information
     notes = models.TextField(blank=True)
-    tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    tags = ArrayField(models.CharField(max_length=50), default=list, blank=True)
+    
+    # Full-text search document, maintained by a database trigger
+    search = SearchVectorField(null=True, editable=False)
     
     # User Account
     user = models.OneToOneField(
@@ -118,16 +207,31 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
     phone_numbers = GenericRelation(PhoneNumber, related_query_name='customer')
     attachments = GenericRelation(Attachment, related_query_name='customer')
 
+    objects = CustomerManager()
+
+    DISPLAY_FIELDS = ('customer_code', 'customer_type', 'company_name', 'first_name', 'last_name')
+
     class Meta:
         verbose_name = 'Customer'
         verbose_name_plural = 'Customers'
         ordering = ['first_name', 'last_name']
         indexes = [
-            models.Index(fields=['customer_code']),
+            models.Index(fields=['entity', 'customer_code_seq']),
+            # Postgres compiles customer_code__iexact to UPPER(...) = UPPER(...)
+            models.Index(Upper('customer_code'), name='cust_code_upper'),
             models.Index(fields=['entity', 'status']),
-            models.Index(fields=['email']),
-            models.Index(fields=['phone']),
+            models.Index(fields=['email'], condition=~models.Q(email=''), name='cust_email_nonblank'),
+            models.Index(fields=['phone'], condition=~models.Q(phone=''), name='cust_phone_nonblank'),
             models.Index(fields=['customer_type', 'customer_segment']),
+            # Trigram index for admin icontains search (requires pg_trgm)
+            GinIndex(
+                fields=['first_name', 'last_name', 'email', 'phone'],
+                opclasses=['gin_trgm_ops'] * 4,
+                name='customer_search_trgm',
+            ),
+            BrinIndex(fields=['created_at'], name='customer_created_brin'),
+            GinIndex(fields=['search'], name='customer_search_gin'),
+            GinIndex(fields=['tags'], name='cust_tags_gin'),
         ]
 
     def __str__(self):
@@ -135,32 +239,39 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
             return f"{self.customer_code} - {self.company_name}"
         return f"{self.customer_code} - {self.get_full_name()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.customer_code:
-            self.customer_code = self.generate_customer_code()
+        self.__dict__.pop('display_name', None)
+        if self._state.adding and not self.customer_code:
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            # Postgres assigns the code in a trigger (see signals.py) and
+            # returns it from the INSERT
+            if connections[using].vendor != 'postgresql':
+                self.assign_customer_code(using)
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        cache.delete(DISPLAY_NAME_CACHE_KEY.format(self.pk))
+
+    @staticmethod
+    def code_sequence_name(entity):
+        return f"customers_customer_code_{entity.lower()}_seq"
 
-    def generate_customer_code(self):
+    def assign_customer_code(self, using='default'):
         """
-        Generate unique customer code.
+        Give the customer the next code for its entity, in the format the
+        Postgres trigger uses. For backends without the trigger.
         """
-        prefix = f"{self.entity[:2]}C"
-        
-        last_customer = Customer.objects.filter(
-            entity=self.entity,
-            customer_code__startswith=prefix
-        ).order_by('customer_code').last()
-        
-        if last_customer:
-            try:
-                last_number = int(last_customer.customer_code[3:])
-                new_number = last_number + 1
-            except ValueError:
-                new_number = 1
-        else:
-            new_number = 1
-            
-        return f"{prefix}{new_number:05d}"
+        last_seq = type(self).all_objects.using(using).filter(entity=self.entity).aggregate(
+            last_seq=models.Max('customer_code_seq')
+        )['last_seq']
+        self.customer_code_seq = (last_seq or 0) + 1
+        prefix = 'MPS' if self.entity == 'MPSHOES' else 'MPF'
+        self.customer_code = f"{prefix}C{self.customer_code_seq:06d}"
 
     def get_full_name(self):
         """
@@ -168,7 +279,7 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
         """
         return f"{self.first_name} {self.last_name}".strip()
 
-    @property
+    @cached_property
     def display_name(self):
         """
         Return display name based on customer type.
@@ -181,71 +292,129 @@ class Customer(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
         """
         Get primary address for the customer.
         """
-        return self.addresses.filter(type='HOME').first()
+        return self.get_address_of_type('HOME')
 
     def get_shipping_address(self):
         """
         Get shipping address for the customer.
         """
-        shipping_addr = self.addresses.filter(type='SHIPPING').first()
+        shipping_addr = self.get_address_of_type('SHIPPING')
         return shipping_addr or self.get_primary_address()
 
+    def get_address_of_type(self, address_type):
+        """
+        Get the first address of a type, using ``with_contacts()`` data if loaded.
+        """
+        if hasattr(self, '_cached_addresses'):
+            return next(
+                (address for address in self._cached_addresses if address.type == address_type),
+                None
+            )
+        return self.addresses.filter(type=address_type).first()
+
     def get_primary_phone(self):
         """
         Get primary phone number for the customer.
         """
+        if hasattr(self, '_cached_primary_phones'):
+            return next(iter(self._cached_primary_phones), None)
         return self.phone_numbers.filter(is_primary=True).first()
 
+    def get_sales_stats(self):
+        """
+        Return purchase statistics, preferring values annotated by
+        ``Customer.objects.with_sales_stats()``.
+
+        The aggregate is computed once per instance, so the metric methods
+        below share a single query.
+        """
+        if hasattr(self, 'order_count'):
+            return {
+                'total_spent': self.total_spent,
+                'order_count': self.order_count,
+                'last_sale_date': self.last_sale_date,
+                'first_sale_date': self.first_sale_date,
+            }
+        if not hasattr(self, '_sales_stats'):
+            self._sales_stats = self.sales.filter(
+                sale_status__in=['CONFIRMED', 'COMPLETED']
+            ).aggregate(
+                total_spent=models.Sum('total_amount'),
+                order_count=models.Count('id'),
+                last_sale_date=models.Max('sale_date'),
+                first_sale_date=models.Min('sale_date'),
+            )
+        return self._sales_stats
+
     def calculate_lifetime_value(self):
         """
         Calculate customer lifetime value.
         """
-        total_spent = self.sales.filter(
-            sale_status__in=['CONFIRMED', 'COMPLETED']
-        ).aggregate(total=models.Sum('total_amount'))['total']
-        return total_spent or Decimal('0.00')
+        return self.get_sales_stats()['total_spent'] or Decimal('0.00')
 
     def calculate_average_order_value(self):
         """
         Calculate average order value.
         """
-        sales = self.sales.filter(sale_status__in=['CONFIRMED', 'COMPLETED'])
-        if sales.exists():
-            total_spent = sales.aggregate(total=models.Sum('total_amount'))['total']
-            return total_spent / sales.count()
+        stats = self.get_sales_stats()
+        if stats['order_count']:
+            return stats['total_spent'] / stats['order_count']
         return Decimal('0.00')
 
     def get_last_purchase_date(self):
         """
         Get date of last purchase.
         """
-        last_sale = self.sales.filter(
-            sale_status__in=['CONFIRMED', 'COMPLETED']
-        ).order_by('-sale_date').first()
-        return last_sale.sale_date.date() if last_sale else None
+        last_sale_date = self.get_sales_stats()['last_sale_date']
+        return last_sale_date.date() if last_sale_date else None
 
     def get_purchase_frequency(self):
         """
         Calculate purchase frequency (purchases per month).
         """
-        first_purchase = self.sales.filter(
-            sale_status__in=['CONFIRMED', 'COMPLETED']
-        ).order_by('sale_date').first()
-        
-        if not first_purchase:
+        stats = self.get_sales_stats()
+        if not stats['first_sale_date']:
             return 0
             
         months_since_first_purchase = (
-            timezone.now().date() - first_purchase.sale_date.date()
+            timezone.now().date() - stats['first_sale_date'].date()
         ).days / 30.44  # Average days in a month
         
         if months_since_first_purchase > 0:
-            total_purchases = self.sales.filter(
-                sale_status__in=['CONFIRMED', 'COMPLETED']
-            ).count()
-            return total_purchases / months_since_first_purchase
+            return stats['order_count'] / months_since_first_purchase
         return 0
 
+    def get_stats_cached(self):
+        """
+        Return the dashboard purchase metrics, cached until the customer's
+        next sale.
+        """
+        signature = cache.get(STATS_SIGNATURE_CACHE_KEY.format(self.pk), 0)
+        return cache.get_or_set(
+            STATS_CACHE_KEY.format(self.pk, signature),
+            self._compute_stats,
+            STATS_CACHE_TIMEOUT
+        )
+
+    def _compute_stats(self):
+        return {
+            'lifetime_value': self.calculate_lifetime_value(),
+            'average_order_value': self.calculate_average_order_value(),
+            'last_purchase_date': self.get_last_purchase_date(),
+            'purchase_frequency': self.get_purchase_frequency(),
+        }
+
+    @staticmethod
+    def touch_stats_signature(customer_id):
+        """
+        Invalidate cached stats for a customer by moving their signature on.
+        """
+        cache.set(
+            STATS_SIGNATURE_CACHE_KEY.format(customer_id),
+            timezone.now().timestamp(),
+            None
+        )
+
 
 class CustomerGroup(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
     """
@@ -279,12 +448,16 @@ class CustomerGroup(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
         default=False,
         help_text="Automatically assign customers based on criteria"
     )
+    
+    # Denormalized statistics
+    active_customer_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = 'Customer Group'
         verbose_name_plural = 'Customer Groups'
         indexes = [
             models.Index(fields=['entity', 'status']),
+            GinIndex(fields=['criteria'], name='grp_criteria_gin'),
         ]
 
     def __str__(self):
@@ -300,7 +473,21 @@ class CustomerGroup(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
         """
         Get count of customers in this group.
         """
-        return self.get_customers().count()
+        return self.active_customer_count
+
+    @classmethod
+    def refresh_customer_counts(cls, group_ids):
+        """
+        Recount active members for the given groups in a single UPDATE.
+        """
+        active_members = CustomerGroupMembership.objects.filter(
+            group=models.OuterRef('pk'),
+            is_active=True,
+            customer__status='ACTIVE'
+        ).order_by().values('group').annotate(total=models.Count('pk')).values('total')
+        cls.objects.filter(pk__in=group_ids).update(
+            active_customer_count=Coalesce(models.Subquery(active_members), 0)
+        )
 
 
 class CustomerGroupMembership(BaseModel):
@@ -321,7 +508,23 @@ class CustomerGroupMembership(BaseModel):
         unique_together = ['customer', 'group']
 
     def __str__(self):
-        return f"{self.customer.display_name} - {self.group.name}"
+        return f"{get_customer_display_name(self.customer_id)} - {self.group.name}"
+
+
+class LoyaltyProgramQuerySet(models.QuerySet):
+    """
+    QuerySet for loyalty programs.
+    """
+    def active(self, today=None):
+        """
+        Programs that are active and within their validity window.
+        """
+        today = today or timezone.now().date()
+        return self.filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=today),
+            status='ACTIVE',
+            start_date__lte=today,
+        )
 
 
 class LoyaltyProgram(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
@@ -388,22 +591,25 @@ class LoyaltyProgram(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
 
+    objects = LoyaltyProgramQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Loyalty Program'
         verbose_name_plural = 'Loyalty Programs'
         indexes = [
             models.Index(fields=['entity', 'status']),
             models.Index(fields=['start_date', 'end_date']),
+            GinIndex(fields=['tier_levels'], name='prog_tier_levels_gin'),
         ]
 
     def __str__(self):
         return self.name
 
-    def is_active(self):
+    def is_currently_valid(self, today=None):
         """
         Check if the loyalty program is currently active.
         """
-        today = timezone.now().date()
+        today = today or timezone.now().date()
         return (
             self.status == 'ACTIVE' and
             self.start_date <= today and
@@ -470,50 +676,113 @@ class CustomerLoyalty(BaseModel, EntityMixin):
         ]
 
     def __str__(self):
-        return f"{self.customer.display_name} - {self.program.name}"
+        return f"{get_customer_display_name(self.customer_id)} - {self.program.name}"
 
     def add_points(self, points, description="", reference_type="", reference_id=None):
         """
         Add points to customer's account.
         """
-        self.points_balance += points
-        self.total_points_earned += points
-        self.last_activity_date = timezone.now().date()
-        self.save()
-        
-        # Create transaction record
-        LoyaltyTransaction.objects.create(
-            loyalty_account=self,
-            transaction_type='EARN',
-            points=points,
-            description=description,
-            reference_type=reference_type,
-            reference_id=reference_id,
-            balance_after=self.points_balance
-        )
+        with transaction.atomic():
+            now = timezone.now()
+            CustomerLoyalty.objects.filter(pk=self.pk).update(
+                points_balance=models.F('points_balance') + points,
+                total_points_earned=models.F('total_points_earned') + points,
+                last_activity_date=now.date(),
+                updated_at=now
+            )
+            self.refresh_from_db(fields=[
+                'points_balance', 'total_points_earned', 'last_activity_date', 'updated_at'
+            ])
+            
+            # Create transaction record
+            LoyaltyTransaction.objects.create(
+                loyalty_account=self,
+                transaction_type='EARN',
+                points=points,
+                description=description,
+                reference_type=reference_type,
+                reference_id=reference_id,
+                balance_after=self.points_balance
+            )
 
     def redeem_points(self, points, description="", reference_type="", reference_id=None):
         """
         Redeem points from customer's account.
         """
-        if points > self.points_balance:
-            raise ValueError("Insufficient points balance")
+        with transaction.atomic():
+            now = timezone.now()
+            updated = CustomerLoyalty.objects.filter(
+                pk=self.pk,
+                points_balance__gte=points
+            ).update(
+                points_balance=models.F('points_balance') - points,
+                total_points_redeemed=models.F('total_points_redeemed') + points,
+                last_activity_date=now.date(),
+                updated_at=now
+            )
+            if not updated:
+                raise ValueError("Insufficient points balance")
+            self.refresh_from_db(fields=[
+                'points_balance', 'total_points_redeemed', 'last_activity_date', 'updated_at'
+            ])
+            
+            # Create transaction record
+            LoyaltyTransaction.objects.create(
+                loyalty_account=self,
+                transaction_type='REDEEM',
+                points=points,
+                description=description,
+                reference_type=reference_type,
+                reference_id=reference_id,
+                balance_after=self.points_balance
+            )
+
+    @classmethod
+    def grant_bulk(cls, entries, reference_type=""):
+        """
+        Add points to many accounts with one bulk_update and one bulk_create.
+
+        ``entries`` is an iterable of ``(account_id, points, description)``.
+        Raises ValueError, before anything is written, if an account doesn't exist.
+        """
+        to_pk = cls._meta.pk.to_python
+        entries = [(to_pk(account_id), points, description) for account_id, points, description in entries]
+        now = timezone.now()
+        
+        with transaction.atomic():
+            account_ids = {account_id for account_id, _points, _description in entries}
+            accounts = cls.objects.select_for_update().in_bulk(account_ids)
+            missing = account_ids - accounts.keys()
+            if missing:
+                raise ValueError(f"Unknown loyalty accounts: {', '.join(sorted(map(str, missing)))}")
             
-        self.points_balance -= points
-        self.total_points_redeemed += points
-        self.last_activity_date = timezone.now().date()
-        self.save()
+            transactions = []
+            for account_id, points, description in entries:
+                account = accounts[account_id]
+                balance_before = account.points_balance
+                account.points_balance += points
+                account.total_points_earned += points
+                account.last_activity_date = now.date()
+                account.updated_at = now
+                transactions.append(LoyaltyTransaction(
+                    entity=account.entity,
+                    loyalty_account=account,
+                    transaction_type='EARN',
+                    points=points,
+                    description=description,
+                    reference_type=reference_type,
+                    balance_before=balance_before,
+                    balance_after=account.points_balance
+                ))
+            
+            cls.objects.bulk_update(
+                accounts.values(),
+                ['points_balance', 'total_points_earned', 'last_activity_date', 'updated_at'],
+                batch_size=1000
+            )
+            LoyaltyTransaction.objects.bulk_create(transactions, batch_size=1000)
         
-        # Create transaction record
-        LoyaltyTransaction.objects.create(
-            loyalty_account=self,
-            transaction_type='REDEEM',
-            points=points,
-            description=description,
-            reference_type=reference_type,
-            reference_id=reference_id,
-            balance_after=self.points_balance
-        )
+        return transactions
 
     def calculate_points_for_amount(self, amount):
         """
@@ -533,6 +802,23 @@ class CustomerLoyalty(BaseModel, EntityMixin):
         return Decimal('0.00')
 
 
+class LoyaltyTransactionQuerySet(models.QuerySet):
+    """
+    QuerySet for loyalty transactions.
+    """
+    def pending_expiry(self, today=None):
+        """
+        Earned points that have reached their expiry date but are not yet
+        marked expired. Matches the ``lt_pending_expiry`` partial index.
+        """
+        today = today or timezone.now().date()
+        return self.filter(
+            transaction_type='EARN',
+            is_expired=False,
+            expires_at__lte=today,
+        )
+
+
 class LoyaltyTransaction(BaseModel, EntityMixin):
     """
     Track all loyalty point transactions.
@@ -568,18 +854,28 @@ class LoyaltyTransaction(BaseModel, EntityMixin):
     expires_at = models.DateField(null=True, blank=True)
     is_expired = models.BooleanField(default=False)
 
+    objects = LoyaltyTransactionQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Loyalty Transaction'
         verbose_name_plural = 'Loyalty Transactions'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['loyalty_account', 'created_at']),
+            models.Index(
+                fields=['loyalty_account', 'transaction_type', '-created_at'],
+                name='lt_acct_type_ct',
+            ),
             models.Index(fields=['transaction_type', 'created_at']),
-            models.Index(fields=['expires_at', 'is_expired']),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(is_expired=False, transaction_type='EARN'),
+                name='lt_pending_expiry',
+            ),
         ]
 
     def __str__(self):
-        return f"{self.loyalty_account.customer.display_name} - {self.transaction_type} - {self.points} points"
+        return f"{get_customer_display_name(self.loyalty_account.customer_id)} - {self.transaction_type} - {self.points} points"
 
 
 class CustomerWishlist(BaseModel):
@@ -632,7 +928,7 @@ class CustomerWishlist(BaseModel):
         ]
 
     def __str__(self):
-        return f"{self.customer.display_name} - {self.product.name}"
+        return f"{get_customer_display_name(self.customer_id)} - {self.product.name}"
 
 
 class CustomerFeedback(BaseModel, EntityMixin):
@@ -718,7 +1014,24 @@ class CustomerFeedback(BaseModel, EntityMixin):
         ]
 
     def __str__(self):
-        return f"{self.customer.display_name} - {self.feedback_type} - {self.rating or 'No'} rating"
+        return f"{get_customer_display_name(self.customer_id)} - {self.feedback_type} - {self.rating or 'No'} rating"
+
+
+class CustomerCommunicationQuerySet(models.QuerySet):
+    """
+    QuerySet for updating communication status in bulk.
+    """
+    def mark_as_sent(self):
+        now = timezone.now()
+        return self.update(is_sent=True, sent_at=now, updated_at=now)
+
+    def mark_as_delivered(self):
+        now = timezone.now()
+        return self.update(is_delivered=True, delivered_at=now, updated_at=now)
+
+    def mark_as_read(self):
+        now = timezone.now()
+        return self.update(is_read=True, read_at=now, updated_at=now)
 
 
 class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
@@ -774,6 +1087,8 @@ class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
     # Attachments
     attachments = GenericRelation(Attachment, related_query_name='customer_communication')
 
+    objects = CustomerCommunicationQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Customer Communication'
         verbose_name_plural = 'Customer Communications'
@@ -785,7 +1100,7 @@ class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
         ]
 
     def __str__(self):
-        return f"{self.customer.display_name} - {self.communication_type} - {self.subject}"
+        return f"{get_customer_display_name(self.customer_id)} - {self.communication_type} - {self.subject}"
 
     def mark_as_sent(self):
         """
@@ -793,7 +1108,7 @@ class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
         """
         self.is_sent = True
         self.sent_at = timezone.now()
-        self.save()
+        self.save(update_fields=['is_sent', 'sent_at', 'updated_at'])
 
     def mark_as_delivered(self):
         """
@@ -801,7 +1116,7 @@ class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
         """
         self.is_delivered = True
         self.delivered_at = timezone.now()
-        self.save()
+        self.save(update_fields=['is_delivered', 'delivered_at', 'updated_at'])
 
     def mark_as_read(self):
         """
@@ -809,4 +1124,4 @@ class CustomerCommunication(BaseModel, EntityMixin, UserTrackingMixin):
         """
         self.is_read = True
         self.read_at = timezone.now()
-        self.save()
\ No newline at end of file
+        self.save(update_fields=['is_read', 'read_at', 'updated_at'])
\ No newline at end of file
@@ -0,0 +1,109 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.models import EntityMixin
+from .models import Customer, CustomerGroup, CustomerGroupMembership
+
+
+CUSTOMER_CODE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION customers_customer_set_code() RETURNS trigger AS $$
+DECLARE
+    next_number bigint;
+BEGIN
+    IF NEW.customer_code IS NULL OR NEW.customer_code = '' THEN
+        next_number := nextval(format('customers_customer_code_%s_seq', lower(NEW.entity))::regclass);
+        NEW.customer_code_seq := next_number;
+        NEW.customer_code := CASE WHEN lower(NEW.entity) = 'mpshoes' THEN 'MPS' ELSE 'MPF' END
+            || 'C'
+            || lpad(next_number::text, 6, '0');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_customer_code_trigger ON customers_customer;
+CREATE TRIGGER customers_customer_code_trigger
+    BEFORE INSERT ON customers_customer
+    FOR EACH ROW EXECUTE FUNCTION customers_customer_set_code();
+"""
+
+CUSTOMER_SEARCH_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION customers_customer_set_search() RETURNS trigger AS $$
+BEGIN
+    NEW.search := to_tsvector('simple', concat_ws(' ',
+        NEW.customer_code, NEW.first_name, NEW.last_name, NEW.email, NEW.phone
+    ));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_customer_search_trigger ON customers_customer;
+CREATE TRIGGER customers_customer_search_trigger
+    BEFORE INSERT OR UPDATE OF customer_code, first_name, last_name, email, phone
+    ON customers_customer
+    FOR EACH ROW EXECUTE FUNCTION customers_customer_set_search();
+"""
+
+
+def install_customer_code_trigger(sender, using='default', **kwargs):
+    """
+    Create the per-entity code sequences and the trigger that assigns
+    customer codes to rows inserted without one (e.g. bulk_create).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for entity, _label in EntityMixin.ENTITY_CHOICES:
+            sequence_name = Customer.code_sequence_name(entity)
+            cursor.execute(
+                f"CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(sequence_name)}"
+            )
+        cursor.execute(CUSTOMER_CODE_TRIGGER_SQL)
+
+
+def install_customer_search_trigger(sender, using='default', **kwargs):
+    """
+    Create the trigger that keeps Customer.search in sync with the
+    columns searched from the admin.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(CUSTOMER_SEARCH_TRIGGER_SQL)
+
+
+@receiver([post_save, post_delete], sender=CustomerGroupMembership)
+def update_group_customer_count(sender, instance, **kwargs):
+    """
+    Keep CustomerGroup.active_customer_count in step with its memberships.
+    """
+    CustomerGroup.refresh_customer_counts([instance.group_id])
+
+
+@receiver(post_save, sender=Customer)
+def update_customer_group_counts(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Recount the customer's groups when their status changed.
+    """
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    # Unknown if the instance was not loaded with its status
+    loaded_status = getattr(instance, '_loaded_status', None)
+    if loaded_status is not None and loaded_status == instance.status:
+        return
+    group_ids = instance.group_memberships.values_list('group_id', flat=True)
+    CustomerGroup.refresh_customer_counts(group_ids)
+
+
+@receiver([post_save, post_delete], sender='sales.Sale')
+def invalidate_customer_stats(sender, instance, **kwargs):
+    """
+    Drop cached purchase metrics when one of the customer's sales changes.
+    """
+    if instance.customer_id:
+        Customer.touch_stats_signature(instance.customer_id)
@@ -1,3 +1,374 @@
+from datetime import date
+from unittest import mock, skipUnless
+from uuid import uuid4
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import (
+    Customer, CustomerGroup, CustomerGroupMembership, CustomerLoyalty, LoyaltyProgram, LoyaltyTransaction
+)
+
+User = get_user_model()
+
+
+class AdminTestCase(TestCase):
+    """
+    Test case logged in to the admin as a superuser.
+    """
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            email='admin@example.com',
+            password='password',
+            first_name='Admin',
+            last_name='User'
+        )
+        self.client.force_login(self.user)
+
+
+class CustomerAdminPagesTests(AdminTestCase):
+    """
+    Tests that every registered customers admin passes its checks and renders.
+    """
+    MODELS = [Customer, CustomerGroup, LoyaltyProgram, CustomerLoyalty, LoyaltyTransaction]
+
+    def setUp(self):
+        super().setUp()
+        customer = Customer.objects.create(customer_code='MPSC000001', first_name='Asha', last_name='Rao')
+        group = CustomerGroup.objects.create(name='Regulars')
+        CustomerGroupMembership.objects.create(customer=customer, group=group)
+        program = LoyaltyProgram.objects.create(name='Rewards', start_date=date(2024, 1, 1))
+        account = CustomerLoyalty.objects.create(customer=customer, program=program)
+        CustomerLoyalty.grant_bulk([(account.pk, 25, 'Welcome')])
+        self.objects = {
+            Customer: customer,
+            CustomerGroup: group,
+            LoyaltyProgram: program,
+            CustomerLoyalty: account,
+            LoyaltyTransaction: account.transactions.get(),
+        }
+
+    def test_admins_pass_system_checks(self):
+        for model in self.MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(admin.site._registry[model].check(), [])
+
+    def test_changelist_and_change_pages_render(self):
+        for model in self.MODELS:
+            opts = model._meta
+            with self.subTest(model=opts.model_name):
+                response = self.client.get(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'))
+                self.assertEqual(response.status_code, 200)
+
+                url = reverse(
+                    f'admin:{opts.app_label}_{opts.model_name}_change', args=[self.objects[model].pk]
+                )
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_customer_changelist_shows_groups_and_points(self):
+        response = self.client.get(reverse('admin:customers_customer_changelist'))
+
+        row = response.context['cl'].result_list[0]
+        self.assertEqual(row._group_name, 'Regulars')
+        self.assertEqual(row._loyalty_points, 25)
+
+
+class CustomerAdminActionTests(AdminTestCase):
+    """
+    Tests for the bulk actions on the customer changelist.
+    """
+    def setUp(self):
+        super().setUp()
+        self.group = CustomerGroup.objects.create(name='Regulars')
+        self.customers = [
+            Customer.objects.create(customer_code=f'MPSC00000{i}', first_name=f'C{i}') for i in range(3)
+        ]
+        for customer in self.customers:
+            CustomerGroupMembership.objects.create(customer=customer, group=self.group)
+
+    def run_action(self, action, customers, **data):
+        return self.client.post(reverse('admin:customers_customer_changelist'), {
+            'action': action,
+            admin.helpers.ACTION_CHECKBOX_NAME: [customer.pk for customer in customers],
+            **data,
+        })
+
+    def test_deactivate_updates_status_and_group_counts(self):
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_customer_count, 3)
+
+        self.run_action('deactivate_customers', self.customers[:2])
+
+        self.assertEqual(
+            [customer.status for customer in Customer.objects.order_by('customer_code')],
+            ['INACTIVE', 'INACTIVE', 'ACTIVE']
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_customer_count, 1)
+
+    def test_disable_marketing_clears_both_channels(self):
+        self.run_action('disable_marketing', self.customers[:1])
+
+        customer = Customer.objects.get(pk=self.customers[0].pk)
+        self.assertEqual((customer.newsletter_subscription, customer.sms_marketing), (False, False))
+        self.assertTrue(Customer.objects.get(pk=self.customers[1].pk).newsletter_subscription)
+
+    def test_adjust_points_writes_ledger_entries(self):
+        program = LoyaltyProgram.objects.create(name='Rewards', start_date=date(2024, 1, 1))
+        account = CustomerLoyalty.objects.create(customer=self.customers[0], program=program, points_balance=5)
+
+        self.run_action('adjust_points', self.customers[:2], points=40)
+
+        account.refresh_from_db()
+        self.assertEqual(account.points_balance, 45)
+        transaction = account.transactions.get()
+        self.assertEqual(
+            (transaction.transaction_type, transaction.points, transaction.reference_type),
+            ('EARN', 40, 'ADMIN')
+        )
+
+    def test_adjust_points_requires_an_amount(self):
+        program = LoyaltyProgram.objects.create(name='Rewards', start_date=date(2024, 1, 1))
+        CustomerLoyalty.objects.create(customer=self.customers[0], program=program)
+
+        self.run_action('adjust_points', self.customers[:1])
+
+        self.assertFalse(LoyaltyTransaction.objects.exists())
+
+
+class LoyaltyProgramAdminTests(AdminTestCase):
+    """
+    Tests for the statistics shown on the loyalty program change page.
+    """
+    def setUp(self):
+        super().setUp()
+        self.program = LoyaltyProgram.objects.create(name='Rewards', start_date=date(2024, 1, 1))
+        other_program = LoyaltyProgram.objects.create(name='Other', start_date=date(2024, 1, 1))
+
+        for code, program, earned, redeemed in [
+            ('MPSC000001', self.program, 100, 30),
+            ('MPSC000002', self.program, 50, 0),
+            ('MPSC000003', other_program, 500, 200),
+            ('MPSC000004', self.program, 0, 0),
+        ]:
+            customer = Customer.objects.create(customer_code=code, first_name=code)
+            account = CustomerLoyalty.objects.create(customer=customer, program=program)
+            if earned:
+                LoyaltyTransaction.objects.create(
+                    loyalty_account=account, transaction_type='EARN', points=earned
+                )
+            if redeemed:
+                LoyaltyTransaction.objects.create(
+                    loyalty_account=account, transaction_type='REDEEM', points=redeemed
+                )
+
+    def test_change_page_shows_program_statistics(self):
+        url = reverse('admin:customers_loyaltyprogram_change', args=[self.program.pk])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        stats = response.context['adminform'].form.instance._stats
+        # The last member is enrolled but has no transactions yet
+        self.assertEqual(stats, {'members': 3, 'issued': 150, 'redeemed': 30})
+
+    def test_add_page_renders_without_statistics(self):
+        response = self.client.get(reverse('admin:customers_loyaltyprogram_add'))
+
+        self.assertEqual(response.status_code, 200)
+
+
+class GrantBulkTests(TestCase):
+    """
+    Tests for granting points to many loyalty accounts at once.
+    """
+    def setUp(self):
+        program = LoyaltyProgram.objects.create(
+            entity='MPFOOTWEAR', name='Rewards', start_date=date(2024, 1, 1)
+        )
+        self.accounts = []
+        for code, balance in [('MPFC000001', 10), ('MPFC000002', 0)]:
+            customer = Customer.objects.create(entity='MPFOOTWEAR', customer_code=code, first_name=code)
+            self.accounts.append(CustomerLoyalty.objects.create(
+                entity='MPFOOTWEAR', customer=customer, program=program, points_balance=balance
+            ))
+
+    def test_grants_points_and_records_transactions(self):
+        first, second = self.accounts
+        CustomerLoyalty.grant_bulk([
+            (first.pk, 5, 'Birthday'),
+            (str(second.pk), 20, 'Birthday'),
+            (first.pk, 1, 'Review'),
+        ], reference_type='CAMPAIGN')
+
+        first.refresh_from_db()
+        self.assertEqual(first.points_balance, 16)
+        self.assertEqual(first.total_points_earned, 6)
+        self.assertEqual(
+            list(first.transactions.order_by('balance_after').values_list(
+                'entity', 'points', 'balance_before', 'balance_after'
+            )),
+            [('MPFOOTWEAR', 5, 10, 15), ('MPFOOTWEAR', 1, 15, 16)]
+        )
+        self.assertEqual(second.transactions.get().reference_type, 'CAMPAIGN')
+
+    def test_unknown_account_writes_nothing(self):
+        with self.assertRaises(ValueError):
+            CustomerLoyalty.grant_bulk([
+                (self.accounts[0].pk, 5, 'Birthday'),
+                (uuid4(), 5, 'Birthday'),
+            ])
+
+        self.assertFalse(LoyaltyTransaction.objects.exists())
+        self.accounts[0].refresh_from_db()
+        self.assertEqual(self.accounts[0].points_balance, 10)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Customer codes are assigned by a Postgres trigger")
+class CustomerCodeTests(TestCase):
+    """
+    Tests for the trigger that assigns customer codes.
+    """
+    def test_codes_use_entity_prefix(self):
+        shoes = Customer.objects.create(entity='MPSHOES', first_name='Asha')
+        footwear = Customer.objects.create(entity='MPFOOTWEAR', first_name='Bina')
+
+        self.assertRegex(shoes.customer_code, r'^MPSC\d{6}$')
+        self.assertRegex(footwear.customer_code, r'^MPFC\d{6}$')
+        self.assertEqual(shoes.customer_code[-6:], f"{shoes.customer_code_seq:06d}")
+
+    def test_equal_sequence_numbers_do_not_collide_across_entities(self):
+        shoes = [Customer.objects.create(entity='MPSHOES', first_name=f'S{i}') for i in range(3)]
+        footwear = [Customer.objects.create(entity='MPFOOTWEAR', first_name=f'F{i}') for i in range(3)]
+
+        codes = [customer.customer_code for customer in shoes + footwear]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual(
+            [customer.customer_code_seq for customer in shoes][1:],
+            [shoes[0].customer_code_seq + 1, shoes[0].customer_code_seq + 2]
+        )
+
+    def test_bulk_create_assigns_codes(self):
+        Customer.objects.bulk_create([
+            Customer(entity='MPSHOES', first_name='Bulk One'),
+            Customer(entity='MPFOOTWEAR', first_name='Bulk Two'),
+        ])
+
+        codes = set(
+            Customer.objects.filter(first_name__startswith='Bulk').values_list('customer_code', flat=True)
+        )
+        self.assertEqual({code[:4] for code in codes}, {'MPSC', 'MPFC'})
+
+    def test_create_reads_the_code_back_from_the_insert(self):
+        with self.assertNumQueries(1):
+            customer = Customer.objects.create(entity='MPSHOES', first_name='Asha')
+
+        self.assertRegex(customer.customer_code, r'^MPSC\d{6}$')
+        self.assertEqual(customer.customer_code[-6:], f"{customer.customer_code_seq:06d}")
+
+    def test_explicit_code_is_kept(self):
+        customer = Customer.objects.create(customer_code='LEGACY001', first_name='Old')
+
+        customer.refresh_from_db()
+        self.assertEqual(customer.customer_code, 'LEGACY001')
+
+
+class CustomerGroupCountTests(TestCase):
+    """
+    Tests for the group counts kept up to date when a customer is saved.
+    """
+    def setUp(self):
+        self.group = CustomerGroup.objects.create(name='Regulars')
+        customer = Customer.objects.create(customer_code='MPSC000001', first_name='Asha')
+        CustomerGroupMembership.objects.create(customer=customer, group=self.group)
+        self.customer = Customer.objects.get(pk=customer.pk)
+
+    def test_status_change_recounts_groups(self):
+        self.customer.status = 'INACTIVE'
+        self.customer.save()
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_customer_count, 0)
+
+    def test_other_changes_do_not_recount_groups(self):
+        self.customer.first_name = 'Asha R'
+        with self.assertNumQueries(1):
+            self.customer.save()
+
+        self.customer.status = 'INACTIVE'
+        self.customer.save()
+        self.customer.first_name = 'Asha'
+        with self.assertNumQueries(1):
+            self.customer.save()
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_customer_count, 0)
+
+
+class CustomerCodeFallbackTests(TestCase):
+    """
+    Tests for the customer codes assigned in save() on other backends.
+    """
+    def test_codes_follow_the_last_sequence_number_per_entity(self):
+        Customer.objects.create(entity='MPSHOES', first_name='Old', customer_code='MPSC000041', customer_code_seq=41)
+
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            first = Customer.objects.create(entity='MPSHOES', first_name='Asha')
+            second = Customer.objects.create(entity='MPSHOES', first_name='Bina')
+            footwear = Customer.objects.create(entity='MPFOOTWEAR', first_name='Chitra')
+
+        self.assertEqual((first.customer_code, first.customer_code_seq), ('MPSC000042', 42))
+        self.assertEqual((second.customer_code, second.customer_code_seq), ('MPSC000043', 43))
+        self.assertEqual(footwear.customer_code[:4], 'MPFC')
+        self.assertEqual(footwear.customer_code[-6:], f"{footwear.customer_code_seq:06d}")
+
+
+@skipUnless(connection.vendor == 'postgresql', "Customer search uses a Postgres tsvector")
+class CustomerAdminSearchTests(AdminTestCase):
+    """
+    Tests for the customer admin search, which also backs autocomplete.
+    """
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create(
+            customer_code='MPSC000042', first_name='Ashwini', last_name='Rao',
+            email='ashwini@example.com', phone='9876543210'
+        )
+        Customer.objects.create(customer_code='MPSC000043', first_name='Bina', phone='9123456780')
+        self.model_admin = admin.site._registry[Customer]
+
+    def search(self, term):
+        queryset, _may_have_duplicates = self.model_admin.get_search_results(
+            None, Customer.objects.all(), term
+        )
+        return list(queryset)
+
+    def test_prefix_searches_match(self):
+        for term in ['MPSC00004', 'mpsc000042', '98765', 'Ash', 'ash rao', 'ashwini@exa']:
+            with self.subTest(term=term):
+                self.assertIn(self.customer, self.search(term))
+
+    def test_non_matching_prefix(self):
+        self.assertEqual(self.search('Ashx'), [])
+
+    def test_changelist_search(self):
+        response = self.client.get(reverse('admin:customers_customer_changelist'), {'q': 'ashw 98765'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [self.customer])
+
+    def test_loyalty_account_autocomplete(self):
+        program = LoyaltyProgram.objects.create(name='Rewards', start_date=date(2024, 1, 1))
+        CustomerLoyalty.objects.create(customer=self.customer, program=program)
+
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'customers',
+            'model_name': 'loyaltytransaction',
+            'field_name': 'loyalty_account',
+            'term': 'Ashw',
+        })
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
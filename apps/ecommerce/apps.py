@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class EcommerceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ecommerce'
+
+    def ready(self):
+        from .signals import (
+            install_cart_item_line_total_trigger, install_cart_totals_trigger,
+            install_guest_cart_expiry_trigger
+        )
+        post_migrate.connect(install_cart_item_line_total_trigger, sender=self)
+        post_migrate.connect(install_cart_totals_trigger, sender=self)
+        post_migrate.connect(install_guest_cart_expiry_trigger, sender=self)
@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import models, connection, transaction, IntegrityError
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 
 from apps.core.models import (
@@ -12,6 +17,26 @@ from apps.core.models import (
 
 User = get_user_model()
 
+# Carts whose totals are recalculated once when their bulk_update() block exits
+_recalc_suspended_carts = ContextVar('recalc_suspended_carts', default=frozenset())
+
+# Unique constraints allowing one active line per product/variant in a cart
+ACTIVE_CART_ITEM_CONSTRAINTS = ('uniq_active_cart_item', 'uniq_active_cart_item_no_variant')
+
+
+class ShoppingCartQuerySet(models.QuerySet):
+    """
+    QuerySet for shopping carts.
+    """
+    def expire_stale(self):
+        """
+        Mark active carts past their expiry as expired in a single UPDATE.
+        """
+        now = timezone.now()
+        return self.filter(status='ACTIVE', expires_at__lt=now).update(
+            status='EXPIRED', updated_at=now
+        )
+
 
 class ShoppingCart(BaseModel, EntityMixin):
     """
@@ -47,6 +72,7 @@ class ShoppingCart(BaseModel, EntityMixin):
     
     # Timestamps
     last_activity = models.DateTimeField(auto_now=True)
+    # Guest carts get a 30 day expiry from a database trigger on insert
     expires_at = models.DateTimeField(null=True, blank=True)
     
     # Conversion Tracking
@@ -66,13 +92,26 @@ class ShoppingCart(BaseModel, EntityMixin):
         default=Decimal('0.00')
     )
 
+    objects = ShoppingCartQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Shopping Cart'
         verbose_name_plural = 'Shopping Carts'
         indexes = [
             models.Index(fields=['customer', 'status']),
             models.Index(fields=['session_key', 'status']),
-            models.Index(fields=['last_activity']),
+            # Abandonment and expiry sweeps only ever look at active carts
+            models.Index(
+                fields=['last_activity'],
+                condition=models.Q(status='ACTIVE'),
+                name='cart_active_last_activity_idx',
+            ),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='ACTIVE'),
+                name='cart_active_expires_at_idx',
+            ),
+            GinIndex(fields=['applied_coupons'], opclasses=['jsonb_path_ops'], name='cart_coupons_gin'),
         ]
 
     def __str__(self):
@@ -80,62 +119,118 @@ class ShoppingCart(BaseModel, EntityMixin):
             return f"Cart - {self.customer.display_name}"
         return f"Guest Cart - {self.session_key}"
 
-    def save(self, *args, **kwargs):
-        # Set expiry for guest carts
-        if not self.customer and not self.expires_at:
-            self.expires_at = timezone.now() + timezone.timedelta(days=30)
-        super().save(*args, **kwargs)
+    def touch(self):
+        """
+        Record cart activity without rewriting the rest of the row.
+        """
+        self.save(update_fields=['last_activity'])
 
     def calculate_totals(self):
         """
         Calculate cart totals.
         """
-        items = self.items.filter(is_active=True)
-        self.items_count = items.count()
-        self.subtotal = sum(item.line_total for item in items)
-        self.save()
+        totals = self.items.filter(is_active=True).aggregate(
+            items_count=Count('id'),
+            subtotal=Coalesce(Sum('line_total'), Decimal('0.00')),
+        )
+        self.items_count = totals['items_count']
+        self.subtotal = totals['subtotal']
+        self.last_activity = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(
+            items_count=self.items_count,
+            subtotal=self.subtotal,
+            last_activity=self.last_activity,
+        )
+
+    def refresh_totals(self):
+        """
+        Bring items_count and subtotal on this instance up to date.
+        """
+        if connection.vendor == 'postgresql':
+            # Maintained by the cart totals trigger, so only reload them
+            self.refresh_from_db(fields=['items_count', 'subtotal', 'last_activity'])
+        else:
+            self.calculate_totals()
+
+    @contextmanager
+    def bulk_update(self):
+        """
+        Defer total refreshes for item saves inside the block to a single
+        refresh_totals() call on exit.
+        """
+        token = _recalc_suspended_carts.set(_recalc_suspended_carts.get() | {self.pk})
+        try:
+            yield self
+        finally:
+            _recalc_suspended_carts.reset(token)
+        self.refresh_totals()
+
+    def add_items(self, items):
+        """
+        Add several items to cart, recalculating totals once.
+
+        Each entry is a dict of add_item() keyword arguments.
+        """
+        with self.bulk_update():
+            return [self.add_item(**item) for item in items]
 
     def add_item(self, product, quantity=1, variant=None, **kwargs):
         """
         Add item to cart.
         """
-        # Check if item already exists
-        existing_item = self.items.filter(
+        existing_items = self.items.filter(
             product=product,
             product_variant=variant,
             is_active=True
-        ).first()
-        
-        if existing_item:
-            existing_item.quantity += quantity
-            existing_item.save()
-            return existing_item
-        else:
-            return CartItem.objects.create(
-                cart=self,
-                product=product,
-                product_variant=variant,
-                quantity=quantity,
-                **kwargs
+        )
+
+        def bump():
+            # line_total is set here too for backends without the line total trigger
+            return existing_items.update(
+                quantity=F('quantity') + quantity,
+                line_total=F('unit_price') * (F('quantity') + quantity),
             )
 
+        # Bump an existing line in place so concurrent adds can't lose updates
+        if not bump():
+            try:
+                with transaction.atomic():
+                    return CartItem.objects.create(
+                        cart=self,
+                        product=product,
+                        product_variant=variant,
+                        quantity=quantity,
+                        **kwargs
+                    )
+            except IntegrityError as e:
+                # Only a concurrent add creating the active line first is expected
+                constraint = getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None)
+                if constraint and constraint not in ACTIVE_CART_ITEM_CONSTRAINTS or not bump():
+                    raise
+
+        if self.pk not in _recalc_suspended_carts.get():
+            self.refresh_totals()
+        return existing_items.get()
+
     def remove_item(self, product, variant=None):
         """
         Remove item from cart.
         """
-        self.items.filter(
-            product=product,
-            product_variant=variant,
-            is_active=True
-        ).update(is_active=False)
-        self.calculate_totals()
+        self.deactivate_items(product=product, product_variant=variant)
 
     def clear(self):
         """
         Clear all items from cart.
         """
-        self.items.filter(is_active=True).update(is_active=False)
-        self.calculate_totals()
+        self.deactivate_items()
+
+    def deactivate_items(self, **filters):
+        """
+        Deactivate active items matching filters and update the totals on
+        this instance.
+        """
+        self.items.filter(is_active=True, **filters).update(is_active=False)
+        self.refresh_totals()
 
     def is_expired(self):
         """
@@ -173,8 +268,9 @@ class CartItem(BaseModel):
     
     # Variant Details
     variant_attributes = models.JSONField(default=dict, blank=True)
+    variant_display = models.CharField(max_length=255, blank=True, editable=False)
     
-    # Calculated Fields
+    # Calculated Fields (kept in sync by a database trigger, see signals.py)
     line_total = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -197,41 +293,107 @@ class CartItem(BaseModel):
         indexes = [
             models.Index(fields=['cart', 'is_active']),
             models.Index(fields=['product', 'product_variant']),
+            GinIndex(fields=['variant_attributes'], opclasses=['jsonb_path_ops'], name='cartitem_variant_attrs_gin'),
+        ]
+        # NULL variants never collide in a unique index, so they get their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cart', 'product', 'product_variant'],
+                condition=models.Q(is_active=True, product_variant__isnull=False),
+                name='uniq_active_cart_item',
+            ),
+            models.UniqueConstraint(
+                fields=['cart', 'product'],
+                condition=models.Q(is_active=True, product_variant__isnull=True),
+                name='uniq_active_cart_item_no_variant',
+            ),
         ]
 
     def __str__(self):
         return f"{self.product_name} x {self.quantity}"
 
     def save(self, *args, **kwargs):
-        # Cache product details
-        if not self.product_name and self.product:
-            self.product_name = self.product.name
-            if self.product.featured_image:
-                self.product_image = self.product.featured_image.url
-                
-        # Set unit price if not provided
-        if not self.unit_price and self.product:
-            if self.product_variant:
-                self.unit_price = self.product_variant.get_price('selling_price')
-            else:
-                self.unit_price = self.product.discounted_price
-                
-        # Calculate line total
+        # Product details only need caching when the line is first created
+        if self._state.adding and self.product_id and not (self.product_name and self.unit_price):
+            product = self.get_product_for_cache()
+
+            # Cache product details
+            if not self.product_name:
+                self.product_name = product.name
+                if product.featured_image:
+                    self.product_image = product.featured_image.url
+
+            # Set unit price if not provided
+            if not self.unit_price:
+                if self.product_variant_id:
+                    self.unit_price = self.product_variant.get_price('selling_price')
+                else:
+                    self.unit_price = product.discounted_price
+
+        self.variant_display = ', '.join(
+            f"{k}: {v}" for k, v in self.variant_attributes.items()
+        )[:255]
+
+        # Mirror the trigger-maintained line total on the instance
         self.line_total = self.unit_price * self.quantity
         
         super().save(*args, **kwargs)
         
-        # Update cart totals
-        if self.cart_id:
-            self.cart.calculate_totals()
+        # Update cart totals. On Postgres the trigger has already written them,
+        # so only a cart loaded alongside this item needs syncing
+        if self.cart_id and self.cart_id not in _recalc_suspended_carts.get():
+            if connection.vendor != 'postgresql':
+                self.cart.calculate_totals()
+            elif self._meta.get_field('cart').is_cached(self):
+                self.cart.refresh_totals()
+
+    PRODUCT_CACHE_FIELDS = ('name', 'featured_image', 'selling_price', 'discount_percentage')
+
+    def get_product_for_cache(self):
+        """
+        Return the product, loading only the columns cached on the line.
+        """
+        product_field = self._meta.get_field('product')
+        if product_field.is_cached(self):
+            return self.product
+        return product_field.related_model.objects.only(
+            *self.PRODUCT_CACHE_FIELDS
+        ).get(pk=self.product_id)
+
+    @classmethod
+    def bulk_create_from_products(cls, cart, product_ids, quantities):
+        """
+        Add products without variants to a cart with one product query and
+        one insert. The products must not already have an active line.
+        """
+        Product = cls._meta.get_field('product').related_model
+        products = Product.objects.only(*cls.PRODUCT_CACHE_FIELDS).in_bulk(product_ids)
+
+        items = []
+        for product_id, quantity in zip(product_ids, quantities):
+            product = products.get(product_id)
+            if product is None:
+                continue
+            unit_price = product.discounted_price
+            items.append(cls(
+                cart=cart,
+                product=product,
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=unit_price * quantity,
+                product_name=product.name,
+                product_image=product.featured_image.url if product.featured_image else '',
+            ))
+
+        items = cls.objects.bulk_create(items, batch_size=500)
+        cart.refresh_totals()
+        return items
 
     def get_variant_display(self):
         """
         Get display text for variant attributes.
         """
-        if self.variant_attributes:
-            return ', '.join([f"{k}: {v}" for k, v in self.variant_attributes.items()])
-        return ''
+        return self.variant_display
 
 
 class Coupon(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
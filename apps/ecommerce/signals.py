@@ -0,0 +1,106 @@
+from django.db import connections
+
+
+CART_ITEM_LINE_TOTAL_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION ecommerce_cartitem_set_line_total() RETURNS trigger AS $$
+BEGIN
+    NEW.line_total := NEW.unit_price * NEW.quantity;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ecommerce_cartitem_line_total_trigger ON ecommerce_cartitem;
+CREATE TRIGGER ecommerce_cartitem_line_total_trigger
+    BEFORE INSERT OR UPDATE OF unit_price, quantity, line_total
+    ON ecommerce_cartitem
+    FOR EACH ROW EXECUTE FUNCTION ecommerce_cartitem_set_line_total();
+"""
+
+CART_TOTALS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION ecommerce_refresh_cart_totals(target_cart_id uuid) RETURNS void AS $$
+BEGIN
+    UPDATE ecommerce_shoppingcart cart
+    SET items_count = totals.items_count,
+        subtotal = totals.subtotal,
+        last_activity = now()
+    FROM (
+        SELECT count(*) AS items_count, coalesce(sum(line_total), 0) AS subtotal
+        FROM ecommerce_cartitem
+        WHERE cart_id = target_cart_id AND is_active
+    ) totals
+    WHERE cart.id = target_cart_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ecommerce_cartitem_update_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM ecommerce_refresh_cart_totals(OLD.cart_id);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.cart_id IS DISTINCT FROM OLD.cart_id) THEN
+        PERFORM ecommerce_refresh_cart_totals(NEW.cart_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ecommerce_cartitem_totals_trigger ON ecommerce_cartitem;
+CREATE TRIGGER ecommerce_cartitem_totals_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF cart_id, quantity, unit_price, line_total, is_active
+    ON ecommerce_cartitem
+    FOR EACH ROW EXECUTE FUNCTION ecommerce_cartitem_update_totals();
+"""
+
+GUEST_CART_EXPIRY_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION ecommerce_shoppingcart_set_expiry() RETURNS trigger AS $$
+BEGIN
+    IF NEW.customer_id IS NULL AND NEW.expires_at IS NULL THEN
+        NEW.expires_at := now() + interval '30 days';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ecommerce_shoppingcart_expiry_trigger ON ecommerce_shoppingcart;
+CREATE TRIGGER ecommerce_shoppingcart_expiry_trigger
+    BEFORE INSERT ON ecommerce_shoppingcart
+    FOR EACH ROW EXECUTE FUNCTION ecommerce_shoppingcart_set_expiry();
+"""
+
+
+def install_cart_item_line_total_trigger(sender, using='default', **kwargs):
+    """
+    Create the trigger that derives CartItem.line_total from its unit price
+    and quantity on every write.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(CART_ITEM_LINE_TOTAL_TRIGGER_SQL)
+
+
+def install_cart_totals_trigger(sender, using='default', **kwargs):
+    """
+    Create the trigger that keeps ShoppingCart.items_count and subtotal in
+    step with its items, in the same transaction as each item change.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(CART_TOTALS_TRIGGER_SQL)
+
+
+def install_guest_cart_expiry_trigger(sender, using='default', **kwargs):
+    """
+    Create the trigger that gives guest carts their default expiry.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(GUEST_CART_EXPIRY_TRIGGER_SQL)
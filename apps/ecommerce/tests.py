@@ -1,3 +1,77 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
 
-# Create your tests here.
+from apps.inventory.models import Brand, Category, Product
+from .models import ShoppingCart
+
+
+@skipUnless(connection.vendor == 'postgresql', "Cart totals are maintained by a Postgres trigger")
+class CartTotalsTriggerTests(TestCase):
+    """
+    Tests for the cart totals kept in sync by the cart item trigger.
+    """
+    def setUp(self):
+        category = Category.objects.create(name='Shoes', slug='shoes')
+        brand = Brand.objects.create(name='Stride', slug='stride')
+        self.runner, self.walker = [
+            Product.objects.create(
+                name=name, slug=sku.lower(), sku=sku, category=category, brand=brand,
+                selling_price=price, mrp=price
+            )
+            for name, sku, price in [
+                ('Runner', 'MPRUN0001', Decimal('100.00')),
+                ('Walker', 'MPWLK0001', Decimal('40.00')),
+            ]
+        ]
+        self.cart = ShoppingCart.objects.create(session_key='guest')
+
+    def assertTotals(self, items_count, subtotal):
+        for cart in [self.cart, ShoppingCart.objects.get(pk=self.cart.pk)]:
+            self.assertEqual((cart.items_count, cart.subtotal), (items_count, Decimal(subtotal)))
+
+    def test_adding_items_updates_totals(self):
+        self.cart.add_item(self.runner, quantity=2, unit_price=Decimal('100.00'))
+        self.assertTotals(1, '200.00')
+
+        self.cart.add_item(self.runner, quantity=1, unit_price=Decimal('100.00'))
+        self.cart.add_item(self.walker, quantity=1, unit_price=Decimal('40.00'))
+        self.assertTotals(2, '340.00')
+
+    def test_bulk_add_refreshes_once_with_final_totals(self):
+        self.cart.add_items([
+            {'product': self.runner, 'quantity': 1, 'unit_price': Decimal('100.00')},
+            {'product': self.walker, 'quantity': 3, 'unit_price': Decimal('40.00')},
+        ])
+
+        self.assertTotals(2, '220.00')
+
+    def test_adding_to_an_existing_line_updates_its_total(self):
+        self.cart.add_item(self.runner, quantity=1, unit_price=Decimal('100.00'))
+        item = self.cart.add_item(self.runner, quantity=2, unit_price=Decimal('100.00'))
+
+        self.assertEqual((item.quantity, item.line_total), (3, Decimal('300.00')))
+        self.assertTotals(1, '300.00')
+
+    def test_other_integrity_errors_are_raised(self):
+        with self.assertRaises(IntegrityError):
+            self.cart.add_item(self.runner, quantity=-1, unit_price=Decimal('100.00'))
+
+    def test_removing_an_item_updates_totals(self):
+        self.cart.add_item(self.runner, quantity=1, unit_price=Decimal('100.00'))
+        self.cart.add_item(self.walker, quantity=2, unit_price=Decimal('40.00'))
+
+        self.cart.remove_item(self.runner)
+
+        self.assertTotals(1, '80.00')
+
+    def test_clear_zeroes_totals(self):
+        self.cart.add_item(self.runner, quantity=1, unit_price=Decimal('100.00'))
+        self.cart.add_item(self.walker, quantity=2, unit_price=Decimal('40.00'))
+
+        self.cart.clear()
+
+        self.assertTotals(0, '0.00')
+        self.assertFalse(self.cart.items.filter(is_active=True).exists())
@@ -3,7 +3,9 @@ from django.contrib import admin
 # Register your models here.
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from apps.core.admin import OnlyFieldsAdminMixin
 from .models import Category, Brand, Product, ProductVariant, StockMovement, StockAlert
 
 
@@ -29,8 +31,13 @@ class CategoryAdmin(admin.ModelAdmin):
     )
 
     def product_count(self, obj):
-        return obj.products.count()
+        return obj._product_count
     product_count.short_description = 'Products'
+    product_count.admin_order_field = '_product_count'
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(_product_count=Count('products'))
 
 
 @admin.register(Brand)
@@ -55,8 +62,13 @@ class BrandAdmin(admin.ModelAdmin):
     )
 
     def product_count(self, obj):
-        return obj.products.count()
+        return obj._product_count
     product_count.short_description = 'Products'
+    product_count.admin_order_field = '_product_count'
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(_product_count=Count('products'))
 
 
 class ProductVariantInline(admin.TabularInline):
@@ -68,8 +80,14 @@ class ProductVariantInline(admin.TabularInline):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(OnlyFieldsAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'sku', 'category', 'brand', 'entity', 'total_stock', 'status', 'created_at')
+    list_select_related = ('category__parent', 'brand')
+    # Keeps description, tags and other wide columns out of the changelist
+    list_only_fields = (
+        'name', 'sku', 'entity', 'status', 'created_at',
+        'category__name', 'category__parent__name', 'brand__name',
+    )
     list_filter = ('status', 'entity', 'category', 'brand', 'is_featured', 'created_at')
     search_fields = ('name', 'sku', 'description')
     readonly_fields = ('slug', 'total_variants', 'total_stock', 'created_at', 'updated_at')
@@ -102,16 +120,21 @@ class ProductAdmin(admin.ModelAdmin):
     )
 
     def total_variants(self, obj):
-        return obj.variants.count()
+        return obj._total_variants
     total_variants.short_description = 'Variants'
+    total_variants.admin_order_field = '_total_variants'
 
     def total_stock(self, obj):
-        return obj.variants.aggregate(total=Sum('stock_quantity'))['total'] or 0
+        return obj._total_stock
     total_stock.short_description = 'Total Stock'
+    total_stock.admin_order_field = '_total_stock'
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('category', 'brand')
+        return qs.select_related('category', 'brand').annotate(
+            _total_variants=Count('variants', distinct=True),
+            _total_stock=Coalesce(Sum('variants__stock_quantity'), 0),
+        )
 
 
 @admin.register(ProductVariant)
@@ -172,7 +195,7 @@ class StockMovementAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('product_variant__product', 'created_by')
+        return qs.select_related('product_variant', 'created_by').prefetch_related('product_variant__product')
 
 
 @admin.register(StockAlert)
@@ -197,7 +220,7 @@ class StockAlertAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('product_variant__product', 'resolved_by')
+        return qs.select_related('product_variant', 'resolved_by').prefetch_related('product_variant__product')
 
 
 # Custom admin actions
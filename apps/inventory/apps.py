@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from .signals import install_slug_triggers, install_adjustment_item_totals_trigger
+        post_migrate.connect(install_slug_triggers, sender=self)
+        post_migrate.connect(install_adjustment_item_totals_trigger, sender=self)
@@ -1,14 +1,71 @@
+import csv
+import os
+from collections import Counter
+
 from django import forms
+from django.db import IntegrityError, models, transaction
 from django.forms import inlineformset_factory
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from .models import Category, Brand, Product, ProductVariant, StockMovement, StockAlert
 
+CATEGORY_CHOICES_CACHE_KEY = 'inv:cat_choices'
+BRAND_CHOICES_CACHE_KEY = 'inv:brand_choices'
+CHOICES_CACHE_TIMEOUT = 300  # 5 minutes
+SKU_CONSTRAINT_NAME = 'uniq_variant_sku'
+
+
+def get_cached_choices(cache_key, model):
+    """
+    Return (id, name) choices for the model's active rows, cached briefly.
+    """
+    return cache.get_or_set(
+        cache_key,
+        lambda: list(model.objects.filter(status='ACTIVE').values_list('id', 'name')),
+        CHOICES_CACHE_TIMEOUT
+    )
+
+
+def resolve_id_list(raw, queryset, label):
+    """
+    Parse a comma-separated id list and check it against queryset in one query.
+    """
+    to_python = queryset.model._meta.pk.to_python
+    ids = {to_python(value.strip()) for value in raw.split(',') if value.strip()}
+    found = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+    missing = ids - found
+    if missing:
+        raise ValidationError(f"Unknown {label}: {', '.join(sorted(map(str, missing)))}")
+    return list(found)
+
+
+def variant_choice_queryset(entity=None):
+    """
+    Active variants for a product_variant dropdown, loading only what
+    ProductVariant.__str__ renders.
+    """
+    queryset = ProductVariant.objects.filter(status='ACTIVE').select_related(
+        'parent_product'
+    ).only('id', 'name', 'sku', 'parent_product__name')
+    if entity:
+        queryset = queryset.filter(parent_product__entity=entity)
+    return queryset
+
+
+class CategoryChoiceField(forms.ModelChoiceField):
+    """Category choice labelled with its stored path, so options need no parent lookups"""
+
+    def label_from_instance(self, obj):
+        return obj.get_full_path()
+
 
 class CategoryForm(forms.ModelForm):
     """Form for creating/editing categories"""
     
     class Meta:
         model = Category
+        field_classes = {'parent': CategoryChoiceField}
         fields = [
             'name', 'entity', 'parent', 'description', 'image',
             'meta_title', 'meta_description', 'is_active'
@@ -29,16 +86,15 @@ class CategoryForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Filter parent categories by entity
+        parents = Category.objects.only('id', 'name', 'path').order_by('path')
         if self.entity:
-            self.fields['parent'].queryset = Category.objects.filter(
-                entity=self.entity,
-                is_active=True
-            )
+            parents = parents.filter(entity=self.entity, status='ACTIVE')
             self.fields['entity'].initial = self.entity
         
         # Exclude self from parent choices when editing
         if self.instance.pk:
-            self.fields['parent'].queryset = self.fields['parent'].queryset.exclude(pk=self.instance.pk)
+            parents = parents.exclude(pk=self.instance.pk)
+        self.fields['parent'].queryset = parents
 
     def clean(self):
         cleaned_data = super().clean()
@@ -79,11 +135,30 @@ class BrandForm(forms.ModelForm):
             self.fields['entity'].initial = self.entity
 
 
-class ProductForm(forms.ModelForm):
+class ProductPriceCleanMixin:
+    """Price ordering checks shared by the product edit and import forms"""
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cost_price, selling_price, discount_price = (
+            cleaned_data.get(key) for key in ('cost_price', 'selling_price', 'discount_price')
+        )
+        
+        if selling_price is not None:
+            if cost_price is not None and selling_price < cost_price:
+                raise ValidationError("Selling price cannot be less than cost price.")
+            if discount_price is not None and discount_price > selling_price:
+                raise ValidationError("Discount price cannot be greater than selling price.")
+        
+        return cleaned_data
+
+
+class ProductForm(ProductPriceCleanMixin, forms.ModelForm):
     """Form for creating/editing products"""
     
     class Meta:
         model = Product
+        field_classes = {'category': CategoryChoiceField}
         fields = [
             'name', 'entity', 'category', 'brand', 'description', 'material',
             'gender', 'age_group', 'season', 'cost_price', 'selling_price',
@@ -125,31 +200,43 @@ class ProductForm(forms.ModelForm):
         self.entity = kwargs.pop('entity', None)
         super().__init__(*args, **kwargs)
         
-        # Filter categories and brands by entity
+        # Filter categories and brands by entity; the dropdowns only need names
+        categories = Category.objects.only('id', 'name', 'path').order_by('path')
+        brands = Brand.objects.only('id', 'name').order_by('name')
         if self.entity:
-            self.fields['category'].queryset = Category.objects.filter(
-                entity=self.entity,
-                is_active=True
-            )
-            self.fields['brand'].queryset = Brand.objects.filter(
-                entity=self.entity,
-                is_active=True
-            )
+            categories = categories.filter(entity=self.entity, status='ACTIVE')
+            brands = brands.filter(entity=self.entity, status='ACTIVE')
             self.fields['entity'].initial = self.entity
+        self.fields['category'].queryset = categories
+        self.fields['brand'].queryset = brands
 
-    def clean(self):
-        cleaned_data = super().clean()
-        cost_price = cleaned_data.get('cost_price')
-        selling_price = cleaned_data.get('selling_price')
-        discount_price = cleaned_data.get('discount_price')
-        
-        if cost_price and selling_price and selling_price < cost_price:
-            raise ValidationError("Selling price cannot be less than cost price.")
-        
-        if discount_price and selling_price and discount_price > selling_price:
-            raise ValidationError("Discount price cannot be greater than selling price.")
-        
-        return cleaned_data
+
+# Wide product columns that ProductForm never renders or saves
+PRODUCT_EDIT_DEFERRED_FIELDS = ('short_description', 'features', 'specifications', 'notes', 'meta_keywords')
+
+
+def get_product_for_edit(pk):
+    """
+    Load a product for ProductForm(instance=...) without the wide columns
+    the form doesn't use. Saving the form only writes the loaded fields.
+    """
+    return Product.objects.defer(*PRODUCT_EDIT_DEFERRED_FIELDS).get(pk=pk)
+
+
+class ProductImportRowForm(ProductPriceCleanMixin, forms.ModelForm):
+    """Trimmed product form for validating one imported CSV/Excel row"""
+
+    use_required_attribute = False
+
+    class Meta:
+        model = Product
+        fields = ['name', 'sku', 'category', 'brand', 'cost_price', 'selling_price']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rows only need the foreign keys resolved, not the related rows loaded
+        self.fields['category'].queryset = Category.objects.only('id')
+        self.fields['brand'].queryset = Brand.objects.only('id')
 
 
 class ProductVariantForm(forms.ModelForm):
@@ -158,40 +245,139 @@ class ProductVariantForm(forms.ModelForm):
     class Meta:
         model = ProductVariant
         fields = [
-            'product', 'size', 'color', 'sku', 'barcode', 'cost_price',
-            'selling_price', 'discount_price', 'stock_quantity', 'reorder_level',
-            'max_stock_level', 'weight', 'dimensions', 'image',
-            'is_active', 'track_inventory', 'allow_backorder'
+            'parent_product', 'name', 'sku', 'barcode', 'attributes', 'cost_price',
+            'selling_price', 'mrp', 'stock_quantity', 'low_stock_threshold',
+            'weight', 'featured_image', 'status'
         ]
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-control'}),
-            'size': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., 8, 9, 10'}),
-            'color': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., Black, Brown'}),
+            'parent_product': forms.Select(attrs={'class': 'form-control'}),
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., Black / 9'}),
             'sku': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Stock Keeping Unit'}),
             'barcode': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Barcode'}),
+            'attributes': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
             'cost_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
             'selling_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
-            'discount_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
+            'mrp': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
             'stock_quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
-            'reorder_level': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
-            'max_stock_level': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
-            'weight': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
-            'dimensions': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'L x W x H (cm)'}),
-            'image': forms.FileInput(attrs={'class': 'form-control'}),
-            'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-            'track_inventory': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-            'allow_backorder': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'low_stock_threshold': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
+            'weight': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001', 'min': '0'}),
+            'featured_image': forms.FileInput(attrs={'class': 'form-control'}),
+            'status': forms.Select(attrs={'class': 'form-control'}),
         }
 
-    def clean_sku(self):
-        sku = self.cleaned_data.get('sku')
-        if sku:
-            queryset = ProductVariant.objects.filter(sku=sku)
-            if self.instance.pk:
-                queryset = queryset.exclude(pk=self.instance.pk)
-            if queryset.exists():
-                raise ValidationError("A product variant with this SKU already exists.")
-        return sku
+    DUPLICATE_SKU_MESSAGE = "A product variant with this SKU already exists."
+
+    # BaseProductVariantFormSet turns this off and maps constraint errors instead
+    check_sku_unique = True
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        if not self.check_sku_unique:
+            # SKU uniqueness is enforced by the uniq_variant_sku constraint on save
+            exclude.add('sku')
+        return exclude
+
+
+class BaseProductVariantFormSet(forms.BaseInlineFormSet):
+    """Variant formset that checks SKUs in one query and saves in batches"""
+
+    BATCH_SIZE = 500
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        form.check_sku_unique = False
+        return form
+
+    def clean(self):
+        super().clean()
+        if not any(self.errors):
+            self.add_duplicate_sku_errors()
+
+    def add_duplicate_sku_errors(self):
+        """
+        Flag forms whose SKU repeats within the formset or belongs to another
+        variant, checking every SKU in one query. Returns True if any did.
+        """
+        forms = [
+            form for form in self.forms
+            if form.cleaned_data.get('sku') and not self._should_delete_form(form)
+        ]
+        skus = Counter(form.cleaned_data['sku'] for form in forms)
+        own_pks = [form.instance.pk for form in self.forms if form.instance.pk]
+        taken = set(
+            self.model.objects.filter(sku__in=skus).exclude(
+                pk__in=own_pks
+            ).values_list('sku', flat=True)
+        )
+
+        found = False
+        for form in forms:
+            sku = form.cleaned_data['sku']
+            if sku in taken or skus[sku] > 1:
+                form.add_error('sku', form.DUPLICATE_SKU_MESSAGE)
+                found = True
+        return found
+
+    def save(self, commit=True):
+        """
+        Save the variants, turning a SKU taken since validation into a form error.
+
+        Duplicates are normally caught by clean(). If another request takes a
+        SKU in between, nothing is saved, the error is added to the offending
+        form and an empty list is returned; check is_valid() before redirecting.
+        """
+        if not commit:
+            return super().save(commit=False)
+
+        try:
+            with transaction.atomic():
+                return self.save_batched()
+        except IntegrityError as e:
+            constraint = getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None)
+            if constraint != SKU_CONSTRAINT_NAME or not self.add_duplicate_sku_errors():
+                raise
+            return []
+
+    def save_batched(self):
+        """
+        Write new, changed and deleted variants with one statement each per
+        batch instead of one save() per form. Model signals are not sent.
+
+        bulk_update() skips Field.pre_save(), which is what commits an upload
+        to storage, so variants with a new file are saved one by one.
+        """
+        instances = super().save(commit=False)
+        model = self.model
+
+        model.objects.bulk_create(self.new_objects, batch_size=self.BATCH_SIZE)
+
+        file_fields = {
+            field.name for field in model._meta.concrete_fields
+            if isinstance(field, models.FileField)
+        }
+        batched = []
+        for obj, changed in self.changed_objects:
+            if file_fields.intersection(changed):
+                obj.save()
+            else:
+                batched.append((obj, changed))
+
+        if batched:
+            concrete_fields = {field.name for field in model._meta.concrete_fields}
+            fields = {
+                name for _obj, changed in batched for name in changed
+            } & concrete_fields
+            now = timezone.now()
+            changed = [obj for obj, _changed in batched]
+            for obj in changed:
+                obj.updated_at = now
+            model.objects.bulk_update(changed, sorted(fields | {'updated_at'}), batch_size=self.BATCH_SIZE)
+
+        if self.deleted_objects:
+            model.objects.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+
+        self.save_m2m()
+        return instances
 
 
 # Inline formset for product variants
@@ -199,6 +385,7 @@ ProductVariantFormSet = inlineformset_factory(
     Product,
     ProductVariant,
     form=ProductVariantForm,
+    formset=BaseProductVariantFormSet,
     extra=1,
     can_delete=True,
     min_num=1,
@@ -224,6 +411,11 @@ class StockMovementForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+    def __init__(self, *args, **kwargs):
+        self.entity = kwargs.pop('entity', None)
+        super().__init__(*args, **kwargs)
+        self.fields['product_variant'].queryset = variant_choice_queryset(self.entity)
+
     def clean_quantity(self):
         quantity = self.cleaned_data.get('quantity')
         if quantity and quantity <= 0:
@@ -255,6 +447,13 @@ class StockAdjustmentForm(forms.Form):
         widget=forms.HiddenInput()
     )
 
+    def clean_variant_ids(self):
+        return resolve_id_list(
+            self.cleaned_data['variant_ids'],
+            ProductVariant.objects.filter(status='ACTIVE'),
+            'variant ids'
+        )
+
 
 class ProductSearchForm(forms.Form):
     """Form for searching products"""
@@ -272,16 +471,12 @@ class ProductSearchForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
-    category = forms.ModelChoiceField(
-        queryset=Category.objects.filter(is_active=True),
+    category = forms.ChoiceField(
         required=False,
-        empty_label='All Categories',
         widget=forms.Select(attrs={'class': 'form-control'})
     )
-    brand = forms.ModelChoiceField(
-        queryset=Brand.objects.filter(is_active=True),
+    brand = forms.ChoiceField(
         required=False,
-        empty_label='All Brands',
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     status = forms.ChoiceField(
@@ -307,6 +502,24 @@ class ProductSearchForm(forms.Form):
         widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Max Price'})
     )
 
+    def __init__(self, *args, **kwargs):
+        render_choices = kwargs.pop('render_choices', True)
+        super().__init__(*args, **kwargs)
+
+        # Endpoints that only validate the query have no dropdowns to fill,
+        # so the ids are checked for shape instead of against the lists
+        if not render_choices:
+            self.fields['category'] = forms.UUIDField(required=False)
+            self.fields['brand'] = forms.UUIDField(required=False)
+            return
+
+        self.fields['category'].choices = [('', 'All Categories')] + get_cached_choices(
+            CATEGORY_CHOICES_CACHE_KEY, Category
+        )
+        self.fields['brand'].choices = [('', 'All Brands')] + get_cached_choices(
+            BRAND_CHOICES_CACHE_KEY, Brand
+        )
+
 
 class StockAlertForm(forms.ModelForm):
     """Form for managing stock alerts"""
@@ -321,6 +534,11 @@ class StockAlertForm(forms.ModelForm):
             'message': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+    def __init__(self, *args, **kwargs):
+        self.entity = kwargs.pop('entity', None)
+        super().__init__(*args, **kwargs)
+        self.fields['product_variant'].queryset = variant_choice_queryset(self.entity)
+
 
 class BulkProductActionForm(forms.Form):
     """Form for bulk product actions"""
@@ -353,6 +571,9 @@ class BulkProductActionForm(forms.Form):
         widget=forms.HiddenInput()
     )
 
+    def clean_product_ids(self):
+        return resolve_id_list(self.cleaned_data['product_ids'], Product.objects.all(), 'product ids')
+
     def clean(self):
         cleaned_data = super().clean()
         action = cleaned_data.get('action')
@@ -370,6 +591,12 @@ class BulkProductActionForm(forms.Form):
 class ProductImportForm(forms.Form):
     """Form for importing products from CSV/Excel"""
     
+    ALLOWED_EXTENSIONS = {'.csv', '.xlsx', '.xls'}
+    MAX_IMPORT_BYTES = 10 * 1024 * 1024  # 10MB
+    HEADER_BYTES = 8192
+    XLSX_MAGIC = b'PK\x03\x04'
+    XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
     file = forms.FileField(
         widget=forms.FileInput(attrs={
             'class': 'form-control',
@@ -394,15 +621,43 @@ class ProductImportForm(forms.Form):
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            if not file.name.endswith(('.csv', '.xlsx', '.xls')):
+            extension = os.path.splitext(file.name)[1].lower()
+            if extension not in self.ALLOWED_EXTENSIONS:
                 raise ValidationError("Please upload a CSV or Excel file.")
             
-            # Check file size (max 10MB)
-            if file.size > 10 * 1024 * 1024:
+            if file.size > self.MAX_IMPORT_BYTES:
                 raise ValidationError("File size should not exceed 10MB.")
+
+            # Sniff the format from the first chunk instead of reading it all
+            file.seek(0)
+            header = file.read(self.HEADER_BYTES)
+            file.seek(0)
+            self.validate_header(extension, header)
+
+            # The import can reuse these instead of reading the header again
+            file.extension = extension
+            file.sniffed_header = header
+
+            # Large uploads are spooled to disk, so the import can stream
+            # them with e.g. pd.read_csv(path, chunksize=1000)
+            self.file_path = getattr(file, 'temporary_file_path', lambda: None)()
         
         return file
 
+    def validate_header(self, extension, header):
+        if extension == '.xlsx':
+            valid = header.startswith(self.XLSX_MAGIC)
+        elif extension == '.xls':
+            valid = header.startswith(self.XLS_MAGIC)
+        else:
+            try:
+                csv.Sniffer().sniff(header.decode('utf-8', 'ignore'), delimiters=',;\t|')
+                valid = b'\x00' not in header
+            except csv.Error:
+                valid = False
+        if not valid:
+            raise ValidationError("The uploaded file does not match its extension.")
+
 
 class QuickStockUpdateForm(forms.Form):
     """Quick form for updating stock levels"""
@@ -432,9 +687,11 @@ class QuickStockUpdateForm(forms.Form):
     def clean_sku(self):
         sku = self.cleaned_data.get('sku')
         if sku:
-            try:
-                ProductVariant.objects.get(sku=sku, is_active=True)
-            except ProductVariant.DoesNotExist:
+            # Keep the pk so the stock update can target the row directly
+            self.variant_pk = ProductVariant.objects.filter(
+                sku=sku, status='ACTIVE'
+            ).values_list('pk', flat=True).first()
+            if self.variant_pk is None:
                 raise ValidationError("Product variant with this SKU does not exist.")
         return sku
 
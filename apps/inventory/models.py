@@ -1,25 +1,66 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Value, ExpressionWrapper
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+from django.db.models.lookups import LessThanOrEqual
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from imagekit.models import ImageSpecField
 from imagekit.processors import ResizeToFit, ResizeToFill
 from decimal import Decimal
 
+from apps.core import imgproxy
 from apps.core.models import (
     BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, 
-    SoftDeleteMixin, Attachment
+    SoftDeleteMixin, SoftDeleteManager, Attachment
 )
 
 User = get_user_model()
 
 
+class SequenceCounter(models.Model):
+    """
+    Named counter used to hand out SKU and adjustment numbers.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Sequence Counter'
+        verbose_name_plural = 'Sequence Counters'
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+    @classmethod
+    def next_value(cls, key, seed=None):
+        """
+        Increment the counter for a key and return the new value.
+
+        The row is locked for the rest of the transaction, so concurrent
+        callers are serialized on this key. A missing counter starts from
+        seed(), which lets it pick up numbers issued before it existed.
+        """
+        with transaction.atomic():
+            counter, created = cls.objects.select_for_update().get_or_create(
+                key=key,
+                # get_or_create only calls seed when it creates the row
+                defaults={'value': seed or 0}
+            )
+            cls.objects.filter(pk=counter.pk).update(value=F('value') + 1)
+            counter.refresh_from_db(fields=['value'])
+        return counter.value
+
+
 class Category(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMixin):
     """
     Product category model with hierarchical structure.
     """
     name = models.CharField(max_length=100)
-    slug = models.SlugField(max_length=100, unique=True)
+    # Filled from the name by a database trigger when left blank
+    slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
     
     # Hierarchical structure
@@ -30,6 +71,8 @@ class Category(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
         blank=True,
         related_name='children'
     )
+    # Denormalized "Parent > Child" path, kept up to date in save()
+    path = models.CharField(max_length=512, blank=True, db_index=True, editable=False)
     
     # Display
     image = models.ImageField(upload_to='categories/', null=True, blank=True)
@@ -58,10 +101,48 @@ class Category(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
             return f"{self.parent.name} > {self.name}"
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_path = instance.__dict__.get('path')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.path = self.build_path()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'path' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['path']
+        super().save(*args, **kwargs)
+
+        old_path = getattr(self, '_loaded_path', None)
+        if old_path and old_path != self.path:
+            self.update_descendant_paths(old_path)
+        self._loaded_path = self.path
+
+    def build_path(self):
+        """
+        Build the path from the parent's stored path.
+        """
+        if self.parent_id:
+            return f"{self.parent.get_full_path()} > {self.name}"
+        return self.name
+
+    def update_descendant_paths(self, old_path):
+        """
+        Rewrite the stored path of every descendant after a rename or move.
+        """
+        descendants = list(self.get_all_children().only('id', 'path'))
+        for category in descendants:
+            if category.path.startswith(old_path):
+                category.path = self.path + category.path[len(old_path):]
+        Category.objects.bulk_update(descendants, ['path'], batch_size=1000)
+
     def get_full_path(self):
         """
         Get the full category path.
         """
+        if self.path:
+            return self.path
         path = [self.name]
         parent = self.parent
         while parent:
@@ -71,12 +152,24 @@ class Category(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelet
 
     def get_all_children(self):
         """
-        Get all descendant categories.
+        Get all descendant categories in a single recursive query.
         """
-        children = list(self.children.all())
-        for child in self.children.all():
-            children.extend(child.get_all_children())
-        return children
+        table = self._meta.db_table
+        descendants = RawSQL(
+            f"""
+            WITH RECURSIVE descendants AS (
+                SELECT id FROM {table}
+                WHERE parent_id = %s AND NOT is_deleted
+                UNION ALL
+                SELECT c.id FROM {table} c
+                JOIN descendants d ON c.parent_id = d.id
+                WHERE NOT c.is_deleted
+            )
+            SELECT id FROM descendants
+            """,
+            [self.pk]
+        )
+        return Category.objects.filter(id__in=descendants)
 
 
 class Brand(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMixin):
@@ -84,7 +177,8 @@ class Brand(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMi
     Product brand model.
     """
     name = models.CharField(max_length=100)
-    slug = models.SlugField(max_length=100, unique=True)
+    # Filled from the name by a database trigger when left blank
+    slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
     logo = models.ImageField(upload_to='brands/', null=True, blank=True)
     website = models.URLField(blank=True)
@@ -106,6 +200,63 @@ class Brand(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMi
         return self.name
 
 
+# Also the condition of the prod_low_stock partial index, so the planner can use it
+LOW_STOCK_CONDITION = Q(track_inventory=True) & Q(
+    LessThanOrEqual(F('stock_quantity') - F('reserved_quantity'), F('low_stock_threshold'))
+)
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet with stock and pricing annotations for product listings.
+    """
+    def with_stock_info(self):
+        """
+        Annotate the values behind available_quantity, is_in_stock,
+        is_low_stock and discounted_price so lists can filter and sort on them.
+        """
+        return self.annotate(
+            available_qty=Greatest(F('stock_quantity') - F('reserved_quantity'), Value(0)),
+            discounted=ExpressionWrapper(
+                F('selling_price') - F('selling_price') * F('discount_percentage') / 100,
+                output_field=models.DecimalField(max_digits=10, decimal_places=2)
+            ),
+        ).annotate(
+            in_stock=ExpressionWrapper(
+                Q(available_qty__gt=F('out_of_stock_threshold')),
+                output_field=models.BooleanField()
+            ),
+            low_stock=ExpressionWrapper(
+                Q(available_qty__lte=F('low_stock_threshold')),
+                output_field=models.BooleanField()
+            ),
+        )
+
+    def needs_restock(self):
+        """
+        Return tracked products at or below their low stock threshold.
+        """
+        return self.with_stock_info().filter(LOW_STOCK_CONDITION)
+
+    def for_listing(self):
+        """
+        Load the related rows that product lists and serializers display.
+        """
+        return self.select_related(
+            'category', 'brand', 'primary_supplier'
+        ).prefetch_related(
+            models.Prefetch(
+                'images',
+                queryset=ProductImage.objects.filter(is_active=True).order_by('sort_order'),
+                to_attr='_cached_images'
+            ),
+            'variants',
+        )
+
+
+ProductManager = SoftDeleteManager.from_queryset(ProductQuerySet)
+
+
 class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDeleteMixin):
     """
     Product model for inventory management.
@@ -224,6 +375,8 @@ class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelete
     # Attachments
     attachments = GenericRelation(Attachment, related_query_name='product')
 
+    objects = ProductManager()
+
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
@@ -234,6 +387,11 @@ class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelete
             models.Index(fields=['category', 'brand']),
             models.Index(fields=['is_featured', 'status']),
             models.Index(fields=['gender', 'status']),
+            models.Index(
+                fields=['entity', 'status'],
+                name='prod_low_stock',
+                condition=LOW_STOCK_CONDITION
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -245,6 +403,14 @@ class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelete
     def __str__(self):
         return f"{self.sku} - {self.name}"
 
+    def thumbnail_url(self, width, height, quality=85):
+        """
+        Return an imgproxy URL for the featured image resized to fit.
+        """
+        if not self.featured_image:
+            return ''
+        return imgproxy.build_url(self.featured_image.url, width, height, quality=quality)
+
     def save(self, *args, **kwargs):
         if not self.sku:
             self.sku = self.generate_sku()
@@ -256,22 +422,29 @@ class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelete
         """
         prefix = f"{self.entity[:2]}"
         category_code = self.category.name[:3].upper() if self.category else "GEN"
-        
-        last_product = Product.objects.filter(
+        sku_prefix = f"{prefix}{category_code}"
+
+        new_number = SequenceCounter.next_value(
+            f"sku:{self.entity}:{sku_prefix}",
+            seed=lambda: self.get_last_sku_number(sku_prefix)
+        )
+        return f"{sku_prefix}{new_number:04d}"
+
+    def get_last_sku_number(self, sku_prefix):
+        """
+        Return the highest SKU number stored under a prefix.
+        """
+        last_product = Product.all_objects.filter(
             entity=self.entity,
-            sku__startswith=f"{prefix}{category_code}",
+            sku__startswith=sku_prefix,
         ).order_by('sku').last()
-        
+
         if last_product:
             try:
-                last_number = int(last_product.sku[-4:])
-                new_number = last_number + 1
+                return int(last_product.sku[-4:])
             except ValueError:
-                new_number = 1
-        else:
-            new_number = 1
-            
-        return f"{prefix}{category_code}{new_number:04d}"
+                pass
+        return 0
 
     @property
     def available_quantity(self):
@@ -306,8 +479,10 @@ class Product(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin, SoftDelete
 
     def get_images(self):
         """
-        Get all product images.
+        Get all product images, using ``for_listing()`` data if loaded.
         """
+        if hasattr(self, '_cached_images'):
+            return self._cached_images
         return self.images.filter(is_active=True).order_by('sort_order')
 
 
@@ -349,6 +524,14 @@ class ProductImage(BaseModel):
     def __str__(self):
         return f"{self.product.name} - Image {self.sort_order}"
 
+    def thumbnail_url(self, width, height, quality=85):
+        """
+        Return an imgproxy URL for the image resized to fit.
+        """
+        if not self.image:
+            return ''
+        return imgproxy.build_url(self.image.url, width, height, quality=quality)
+
 
 class ProductVariant(BaseModel, StatusMixin):
     """
@@ -362,7 +545,7 @@ class ProductVariant(BaseModel, StatusMixin):
     
     # Variant Information
     name = models.CharField(max_length=200)
-    sku = models.CharField(max_length=50, unique=True)
+    sku = models.CharField(max_length=50)
     barcode = models.CharField(max_length=50, blank=True)
     
     # Variant Attributes
@@ -407,7 +590,9 @@ class ProductVariant(BaseModel, StatusMixin):
         verbose_name_plural = 'Product Variants'
         indexes = [
             models.Index(fields=['parent_product', 'status']),
-            models.Index(fields=['sku']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['sku'], name='uniq_variant_sku'),
         ]
 
     def __str__(self):
@@ -430,6 +615,17 @@ class ProductVariant(BaseModel, StatusMixin):
         return getattr(self.parent_product, price_type)
 
 
+class StockMovementQuerySet(models.QuerySet):
+    """
+    QuerySet for stock movements.
+    """
+    def for_listing(self):
+        """
+        Join the product and variant shown alongside each movement.
+        """
+        return self.select_related('product', 'product_variant')
+
+
 class StockMovement(BaseModel, EntityMixin, UserTrackingMixin):
     """
     Track all stock movements for products and variants.
@@ -488,6 +684,8 @@ class StockMovement(BaseModel, EntityMixin, UserTrackingMixin):
     reason = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
 
+    objects = StockMovementQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Stock Movement'
         verbose_name_plural = 'Stock Movements'
@@ -560,19 +758,85 @@ class StockAdjustment(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
         """
         prefix = f"{self.entity[:2]}ADJ"
         current_year = self.adjustment_date.year
-        
+
+        new_number = SequenceCounter.next_value(
+            f"adjustment:{self.entity}:{current_year}",
+            seed=lambda: self.get_last_adjustment_number(f"{prefix}{current_year}")
+        )
+        return f"{prefix}{current_year}-{new_number:04d}"
+
+    def get_last_adjustment_number(self, number_prefix):
+        """
+        Return the highest adjustment number stored under a prefix.
+        """
         last_adjustment = StockAdjustment.objects.filter(
             entity=self.entity,
-            adjustment_number__startswith=f"{prefix}{current_year}",
+            adjustment_number__startswith=number_prefix,
         ).order_by('adjustment_number').last()
-        
+
         if last_adjustment:
-            last_number = int(last_adjustment.adjustment_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-            
-        return f"{prefix}{current_year}-{new_number:04d}"
+            return int(last_adjustment.adjustment_number.split('-')[-1])
+        return 0
+
+    def approve(self, user):
+        """
+        Apply every item to stock and record the movements in bulk.
+
+        Products and variants are locked, updated with one bulk_update each
+        and the movements written with one bulk_create.
+        """
+        if self.is_approved:
+            raise ValueError("Adjustment is already approved")
+
+        now = timezone.now()
+        with transaction.atomic():
+            items = list(self.items.all())
+            products = Product.objects.select_for_update().in_bulk(
+                {item.product_id for item in items if not item.product_variant_id}
+            )
+            variants = ProductVariant.objects.select_for_update().in_bulk(
+                {item.product_variant_id for item in items if item.product_variant_id}
+            )
+
+            movements = []
+            for item in items:
+                if item.product_variant_id:
+                    stock = variants[item.product_variant_id]
+                else:
+                    stock = products[item.product_id]
+                stock_before = stock.stock_quantity
+                stock.stock_quantity = item.adjusted_quantity
+                stock.updated_at = now
+                movements.append(StockMovement(
+                    entity=self.entity,
+                    product_id=item.product_id,
+                    product_variant_id=item.product_variant_id,
+                    movement_type='ADJUSTMENT',
+                    quantity=item.adjusted_quantity - stock_before,
+                    unit_cost=item.unit_cost,
+                    stock_before=stock_before,
+                    stock_after=item.adjusted_quantity,
+                    reference_type='ADJUSTMENT',
+                    reference_number=self.adjustment_number,
+                    reference_id=self.pk,
+                    reason=item.reason or self.get_reason_display(),
+                    created_by=user,
+                ))
+
+            Product.objects.bulk_update(
+                products.values(), ['stock_quantity', 'updated_at'], batch_size=1000
+            )
+            ProductVariant.objects.bulk_update(
+                variants.values(), ['stock_quantity', 'updated_at'], batch_size=1000
+            )
+            StockMovement.objects.bulk_create(movements, batch_size=1000)
+
+            self.is_approved = True
+            self.approved_by = user
+            self.approved_at = now
+            self.save(update_fields=['is_approved', 'approved_by', 'approved_at', 'updated_at'])
+
+        return movements
 
 
 class StockAdjustmentItem(BaseModel):
@@ -595,7 +859,8 @@ class StockAdjustmentItem(BaseModel):
     # Quantities
     current_quantity = models.PositiveIntegerField()
     adjusted_quantity = models.PositiveIntegerField()
-    difference = models.IntegerField(help_text="Adjusted - Current")
+    # Calculated Fields (kept in sync by a database trigger, see signals.py)
+    difference = models.IntegerField(default=0, help_text="Adjusted - Current")
     
     # Pricing
     unit_cost = models.DecimalField(
@@ -621,6 +886,7 @@ class StockAdjustmentItem(BaseModel):
         return f"{self.product.name} - {self.difference}"
 
     def save(self, *args, **kwargs):
+        # Mirror the trigger-maintained values on the instance
         self.difference = self.adjusted_quantity - self.current_quantity
         self.total_cost = abs(self.difference) * self.unit_cost
         super().save(*args, **kwargs)
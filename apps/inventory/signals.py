@@ -0,0 +1,66 @@
+from django.db import connections
+
+
+SLUG_TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION inventory_set_slug_from_name() RETURNS trigger AS $$
+BEGIN
+    IF NEW.slug IS NULL OR NEW.slug = '' THEN
+        NEW.slug := trim(both '-' from regexp_replace(lower(NEW.name), '[^a-z0-9]+', '-', 'g'));
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SLUG_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS {table}_slug_trigger ON {table};
+CREATE TRIGGER {table}_slug_trigger
+    BEFORE INSERT OR UPDATE OF name, slug ON {table}
+    FOR EACH ROW EXECUTE FUNCTION inventory_set_slug_from_name();
+"""
+
+SLUG_TRIGGER_TABLES = ('inventory_category', 'inventory_brand')
+
+ADJUSTMENT_ITEM_TOTALS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION inventory_stockadjustmentitem_set_totals() RETURNS trigger AS $$
+BEGIN
+    NEW.difference := NEW.adjusted_quantity - NEW.current_quantity;
+    NEW.total_cost := abs(NEW.difference) * NEW.unit_cost;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS inventory_stockadjustmentitem_totals_trigger ON inventory_stockadjustmentitem;
+CREATE TRIGGER inventory_stockadjustmentitem_totals_trigger
+    BEFORE INSERT OR UPDATE OF current_quantity, adjusted_quantity, unit_cost, difference, total_cost
+    ON inventory_stockadjustmentitem
+    FOR EACH ROW EXECUTE FUNCTION inventory_stockadjustmentitem_set_totals();
+"""
+
+
+def install_slug_triggers(sender, using='default', **kwargs):
+    """
+    Create the triggers that fill in blank category and brand slugs from
+    their names, so bulk inserts don't need to slugify in Python.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(SLUG_TRIGGER_FUNCTION_SQL)
+        for table in SLUG_TRIGGER_TABLES:
+            cursor.execute(SLUG_TRIGGER_SQL.format(table=table))
+
+
+def install_adjustment_item_totals_trigger(sender, using='default', **kwargs):
+    """
+    Create the trigger that derives StockAdjustmentItem.difference and
+    total_cost from the quantities on every write.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(ADJUSTMENT_ITEM_TOTALS_TRIGGER_SQL)
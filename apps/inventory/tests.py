@@ -1,3 +1,226 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from .forms import CategoryChoiceField, ProductVariantForm, ProductVariantFormSet
+from .models import Brand, Category, Product, ProductVariant, SequenceCounter
+
+
+def create_product(name='Runner', sku='MPRUN0001'):
+    category, _created = Category.objects.get_or_create(name='Shoes', slug='shoes')
+    brand, _created = Brand.objects.get_or_create(name='Stride', slug='stride')
+    return Product.objects.create(
+        name=name,
+        slug=sku.lower(),
+        sku=sku,
+        category=category,
+        brand=brand,
+        selling_price=Decimal('100.00'),
+        mrp=Decimal('120.00'),
+    )
+
+
+class CategoryChoiceFieldTests(TestCase):
+    """
+    Tests for the category picker labels.
+    """
+    def test_labels_show_the_parent_without_extra_queries(self):
+        shoes = Category.objects.create(name='Shoes', slug='shoes')
+        Category.objects.create(name='Running', slug='running', parent=shoes)
+        field = CategoryChoiceField(Category.objects.only('id', 'name', 'path').order_by('path'))
+
+        with self.assertNumQueries(1):
+            labels = [label for _value, label in field.choices][1:]
+        self.assertEqual(labels, ['Shoes', 'Shoes > Running'])
+
+
+class ProductVariantFormTests(TestCase):
+    """
+    Tests for editing a single product variant.
+    """
+    def setUp(self):
+        self.product = create_product()
+        ProductVariant.objects.create(parent_product=self.product, name='Black / 9', sku='RUN-BLK-9')
+
+    def test_duplicate_sku_is_a_form_error(self):
+        form = ProductVariantForm(data={
+            'parent_product': self.product.pk,
+            'name': 'Black / 9 copy',
+            'sku': 'RUN-BLK-9',
+            'attributes': '{"size": "9"}',
+            'stock_quantity': 0,
+            'status': 'ACTIVE',
+        })
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('sku', form.errors)
+
+
+class ProductVariantFormSetTests(TestCase):
+    """
+    Tests for saving variants through the batched formset.
+    """
+    def setUp(self):
+        self.product = create_product()
+        self.black = ProductVariant.objects.create(
+            parent_product=self.product, name='Black / 9', sku='RUN-BLK-9', attributes={'size': '9'}
+        )
+        self.white = ProductVariant.objects.create(
+            parent_product=self.product, name='White / 9', sku='RUN-WHT-9', attributes={'size': '9'}
+        )
+
+    def get_formset(self, rows, files=None):
+        existing = [row for row in rows if 'id' in row]
+        data = {
+            'variants-TOTAL_FORMS': len(rows),
+            'variants-INITIAL_FORMS': len(existing),
+            'variants-MIN_NUM_FORMS': 1,
+            'variants-MAX_NUM_FORMS': 1000,
+        }
+        for i, row in enumerate(rows):
+            row = {'attributes': '{"size": "9"}', 'stock_quantity': 0, 'status': 'ACTIVE', **row}
+            for key, value in row.items():
+                data[f'variants-{i}-{key}'] = value
+        return ProductVariantFormSet(data, files, instance=self.product)
+
+    def existing_row(self, variant, **changes):
+        row = {'id': variant.pk, 'name': variant.name, 'sku': variant.sku}
+        row.update(changes)
+        return row
+
+    def test_creates_updates_and_deletes_in_one_save(self):
+        formset = self.get_formset([
+            self.existing_row(self.black, stock_quantity=7),
+            self.existing_row(self.white, DELETE='on'),
+            {'name': 'Red / 10', 'sku': 'RUN-RED-10'},
+            {'name': 'Red / 11', 'sku': 'RUN-RED-11'},
+        ])
+
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+
+        self.black.refresh_from_db()
+        self.assertEqual(self.black.stock_quantity, 7)
+        self.assertFalse(ProductVariant.objects.filter(pk=self.white.pk).exists())
+        self.assertEqual(
+            set(self.product.variants.values_list('sku', flat=True)),
+            {'RUN-BLK-9', 'RUN-RED-10', 'RUN-RED-11'}
+        )
+
+    def test_new_image_on_an_existing_variant_is_stored(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        buffer = io.BytesIO()
+        Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+        image = SimpleUploadedFile('black.png', buffer.getvalue(), content_type='image/png')
+
+        formset = self.get_formset(
+            [self.existing_row(self.black), self.existing_row(self.white, stock_quantity=3)],
+            files={'variants-0-featured_image': image},
+        )
+        self.assertTrue(formset.is_valid(), formset.errors)
+        with override_settings(MEDIA_ROOT=media_root):
+            formset.save()
+
+            self.black.refresh_from_db()
+            self.assertTrue(self.black.featured_image.name.startswith('products/variants/'))
+            self.assertTrue(self.black.featured_image.storage.exists(self.black.featured_image.name))
+        self.white.refresh_from_db()
+        self.assertEqual(self.white.stock_quantity, 3)
+
+    def test_sku_of_another_variant_is_a_form_error(self):
+        other = create_product(name='Walker', sku='MPWLK0001')
+        ProductVariant.objects.create(parent_product=other, name='Tan / 8', sku='WLK-TAN-8')
+
+        formset = self.get_formset([
+            self.existing_row(self.black),
+            {'name': 'Tan / 8', 'sku': 'WLK-TAN-8'},
+        ])
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms[0].errors, {})
+        self.assertIn('sku', formset.forms[1].errors)
+
+    def test_repeated_sku_within_the_formset_is_a_form_error(self):
+        formset = self.get_formset([
+            {'name': 'Red / 10', 'sku': 'RUN-RED-10'},
+            {'name': 'Red / 10 again', 'sku': 'RUN-RED-10'},
+        ])
+
+        self.assertFalse(formset.is_valid())
+        self.assertIn('sku', formset.forms[0].errors)
+        self.assertIn('sku', formset.forms[1].errors)
+
+    def test_changing_an_own_sku_is_allowed(self):
+        formset = self.get_formset([
+            self.existing_row(self.black, sku='RUN-BLK-9-OLD'),
+            self.existing_row(self.white),
+        ])
+
+        self.assertTrue(formset.is_valid(), formset.errors)
+
+    @skipUnless(connection.vendor == 'postgresql', "Constraint names are read from psycopg2 diagnostics")
+    def test_sku_taken_after_validation_is_mapped_to_the_form(self):
+        formset = self.get_formset([
+            self.existing_row(self.black),
+            {'name': 'Red / 10', 'sku': 'RUN-RED-10'},
+        ])
+        self.assertTrue(formset.is_valid(), formset.errors)
+
+        other = create_product(name='Walker', sku='MPWLK0001')
+        ProductVariant.objects.create(parent_product=other, name='Red / 10', sku='RUN-RED-10')
+
+        self.assertEqual(formset.save(), [])
+        self.assertFalse(formset.is_valid())
+        self.assertIn('sku', formset.forms[1].errors)
+        self.assertEqual(self.product.variants.count(), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs row locks shared between connections")
+class SequenceCounterTests(TransactionTestCase):
+    """
+    Tests for handing out numbers from concurrent connections.
+    """
+    THREADS = 8
+    CALLS = 5
+
+    def test_seed_only_runs_when_the_counter_is_created(self):
+        seed = mock.Mock(return_value=41)
+
+        values = [SequenceCounter.next_value('adjustment:test', seed=seed) for _ in range(3)]
+
+        self.assertEqual(values, [42, 43, 44])
+        seed.assert_called_once_with()
+
+    def test_concurrent_increments_never_repeat(self):
+        barrier = threading.Barrier(self.THREADS)
+        values, errors = [], []
+
+        def take_numbers():
+            try:
+                barrier.wait()
+                for _ in range(self.CALLS):
+                    values.append(SequenceCounter.next_value('sku:test', seed=lambda: 100))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=take_numbers) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.CALLS
+        self.assertEqual(sorted(values), list(range(101, 101 + total)))
+        self.assertEqual(SequenceCounter.objects.get(key='sku:test').value, 100 + total)
@@ -152,6 +152,12 @@ class Sale(BaseModel, EntityMixin, StatusMixin, UserTrackingMixin):
             models.Index(fields=['entity', 'sale_date']),
             models.Index(fields=['sale_number']),
             models.Index(fields=['customer', 'sale_date']),
+            # Covers the per-customer sales statistics (status filter + date MIN/MAX + SUM)
+            models.Index(
+                fields=['customer', 'sale_status', 'sale_date'],
+                include=['total_amount'],
+                name='sale_cust_status_date'
+            ),
             models.Index(fields=['sales_person', 'sale_date']),
             models.Index(fields=['sale_status', 'payment_status']),
         ]
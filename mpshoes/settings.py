@@ -158,6 +158,9 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Spool uploads over 1MB to disk so imports can stream them
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1 * 1024 * 1024
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -216,10 +219,24 @@ CORS_ALLOWED_ORIGINS = config(
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
+# imagekit's generation task sends the cache file pickled, so it runs on its own
+# queue and only that worker accepts pickle:
+#   CELERY_THUMBNAIL_WORKER=True celery -A mpshoes worker -Q thumbnails
+CELERY_TASK_ROUTES = {
+    'imagekit.cachefiles.backends._generate_file': {'queue': 'thumbnails'},
+}
+if config('CELERY_THUMBNAIL_WORKER', default=False, cast=bool):
+    CELERY_ACCEPT_CONTENT = ['json', 'pickle']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Image Thumbnails
+# Thumbnails are generated by a Celery worker when the source image is saved,
+# and .url is returned without checking the cache or storage on each request
+IMAGEKIT_DEFAULT_CACHEFILE_BACKEND = 'imagekit.cachefiles.backends.Celery'
+IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY = 'imagekit.cachefiles.strategies.Optimistic'
+
 # Cache Configuration
 CACHES = {
     'default': {
@@ -247,6 +264,12 @@ RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 
+# Image Proxy Configuration
+# Resized product images are served by imgproxy when IMGPROXY_URL is set
+IMGPROXY_URL = config('IMGPROXY_URL', default='')
+IMGPROXY_KEY = config('IMGPROXY_KEY', default='')
+IMGPROXY_SALT = config('IMGPROXY_SALT', default='')
+
 # Entity Configuration
 ENTITIES = {
     'MPSHOES': {